@@ -1,10 +1,7 @@
+import os
+import threading
 import streamlit as st
-import streamlit_shadcn_ui as ui
 from config.sources import NEWS_SOURCES
-from utils.database import save_preferences
-from utils.scraper import scrape_sources
-from utils.ai_curator import curate_newsletter
-from utils.email_sender import send_newsletter
 from utils.auth import (
     init_auth, sign_up, sign_in, sign_out, reset_password,
     get_current_user, is_authenticated, get_user_email, handle_auth_state_change
@@ -13,6 +10,9 @@ from utils.auth import (
 
 st.set_page_config(page_title="AI Newsletter MVP", page_icon="📰", layout="wide")
 
+# Comma-separated emails that get the pipeline metrics panel
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
 # Initialize authentication
 init_auth()
 handle_auth_state_change()
@@ -79,6 +79,8 @@ def show_auth_page():
 
 def show_main_app():
     """Show main newsletter application"""
+    # Imported here so the sign-in page does not wait for them
+    import streamlit_shadcn_ui as ui
     user = get_current_user()
     user_email = get_user_email()
     
@@ -94,29 +96,107 @@ def show_main_app():
     
     # Step 1: Topic Selection
     st.subheader("1. Choose Your Topics")
-    selected_categories = ui.tabs(
-        options=list(NEWS_SOURCES.keys()), 
-        default_value='AI', 
-        key="topic_tabs"
+    selected_categories = st.multiselect(
+        "Topics",
+        options=list(NEWS_SOURCES.keys()),
+        default=['AI'],
+        key="topic_select"
     )
     
-    st.write(f"You selected: {selected_categories}")
+    st.write(f"You selected: {', '.join(selected_categories) or 'nothing yet'}")
     
     # Step 2: Generate Button (email is automatically user's email)
     if ui.button("Generate My Newsletter", key="generate_btn"):
+        if not selected_categories:
+            st.error("Please choose at least one topic")
+            return
+        
+        # The pipeline's SDKs (requests, bs4, groq) load on the first run only
+        from utils.scraper import iter_scrape_categories, merge_category_articles
+        from utils.ai_curator import stream_newsletter
+        from utils.sent_history import get_sent_filter
+
+        # Articles appear as each source finishes; all topics share one fetch plan,
+        # and articles this reader was already sent are skipped before fetching
+        st.markdown("### Articles:")
+        articles_placeholder = st.empty()
+        found = {category: [] for category in selected_categories}
+        sent_filter = get_sent_filter(user_email)
         with st.spinner("🔍 Scraping sources..."):
-            articles = scrape_sources(selected_categories)
+            for category, article in iter_scrape_categories(selected_categories, exclude=sent_filter):
+                found[category].append(article)
+                articles_placeholder.markdown(format_article_list(found))
+        articles = merge_category_articles(found)
         
+        # The preview fills in as the model writes
+        st.markdown("### Preview:")
+        preview_placeholder = st.empty()
+        newsletter_content = ""
         with st.spinner("🤖 AI is curating your newsletter..."):
-            newsletter_content = curate_newsletter(articles, [selected_categories])
+            for piece in stream_newsletter(articles, selected_categories):
+                newsletter_content += piece
+                preview_placeholder.markdown(newsletter_content)
+        
+        # Sending happens in the background as soon as the text is final
+        threading.Thread(
+            target=dispatch_newsletter,
+            args=(user_email, selected_categories, newsletter_content,
+                  [article['source'] for article in articles], sent_filter),
+            daemon=True
+        ).start()
+        st.success("✅ Newsletter is on its way! Check your inbox.")
+    
+    if user_email and user_email.lower() in ADMIN_EMAILS:
+        show_metrics_panel()
+
+def show_metrics_panel():
+    """Per-source latency and success rates for this server process (admins only)"""
+    from utils.metrics import get_metrics
+    
+    metrics = get_metrics()
+    with st.expander("📊 Pipeline metrics"):
+        snapshot = metrics.snapshot()
+        if snapshot['spans']:
+            st.dataframe(snapshot['spans'], use_container_width=True)
+        else:
+            st.caption("Nothing recorded yet in this process.")
+        if snapshot['counters']:
+            st.dataframe(snapshot['counters'], use_container_width=True)
         
-        with st.spinner("📧 Sending email..."):
-            save_preferences(user_email, [selected_categories])
-            send_newsletter(user_email, newsletter_content)
+        from utils.source_health import get_source_health
+        health = get_source_health().snapshot()
+        if health:
+            st.caption("Source health (persists across restarts)")
+            st.dataframe(health, use_container_width=True)
         
-        st.success("✅ Newsletter sent! Check your inbox.")
-        st.markdown("### Preview:")
-        st.markdown(newsletter_content)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Prometheus text", metrics.to_prometheus(), file_name="metrics.prom")
+        with col2:
+            st.download_button("JSON", metrics.to_json(indent=2), file_name="metrics.json")
+        with col3:
+            if st.button("Reset"):
+                metrics.reset()
+                st.rerun()
+
+def format_article_list(found):
+    """Markdown bullet list of the articles found so far, grouped by topic"""
+    sections = []
+    for category, articles in found.items():
+        if articles:
+            items = "\n".join(f"- [{a['title']}]({a['source']})" for a in articles)
+            sections.append(f"**{category}**\n{items}" if len(found) > 1 else items)
+    return "\n\n".join(sections)
+
+def dispatch_newsletter(user_email, topics, newsletter_content, article_urls=(), sent_filter=None):
+    """Save preferences, send the email and remember its articles (runs off the script thread)"""
+    from utils.database import queue_preferences
+    from utils.email_sender import send_newsletter
+    from utils.sent_history import record_sent
+
+    queue_preferences(user_email, topics)
+    if send_newsletter(user_email, newsletter_content):
+        record_sent(user_email, topics, list(article_urls), sent_filter)
 
 # Main app logic
 if is_authenticated():
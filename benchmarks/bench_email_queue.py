@@ -0,0 +1,52 @@
+"""
+Throughput of the email dispatch queue against the local stub transport.
+
+    python benchmarks/bench_email_queue.py --messages 2000 --rate 10 --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.email_queue import DispatchQueue, Outbox, StubTransport  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email queue throughput against the stub transport")
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=10.0, help="requests per second allowed")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        transport = StubTransport(latency=args.latency, failure_rate=args.failure_rate)
+        queue = DispatchQueue(
+            transport=transport,
+            outbox=Outbox(os.path.join(tmp, "outbox.sqlite3")),
+            workers=args.workers,
+            rate=args.rate,
+            batch_size=args.batch_size,
+            max_attempts=10,
+        )
+        for i in range(args.messages):
+            queue.enqueue({"to": f"user{i}@example.com", "subject": "Bench", "html": "<p>hi</p>"}, f"bench:{i}")
+
+        started = time.perf_counter()
+        queue.run()
+        elapsed = time.perf_counter() - started
+
+        counts = queue.outbox.counts()
+        print(f"📧 {len(transport.sent)} delivered in {elapsed:.2f}s "
+              f"({len(transport.sent) / elapsed:.0f} emails/s, {transport.requests} requests)")
+        print(f"   outbox: {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare article extraction engines on saved HTML fixtures.
+
+For every fixture in benchmarks/fixtures/html/ the expected text lives next
+to it as <name>.expected.txt. Each engine is scored on token-level F1
+against that text and timed over several runs. A large synthetic page
+(one fixture padded with boilerplate) shows how the engines scale.
+
+    python benchmarks/bench_extractors.py [--runs 50]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.extractor import ENGINES  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        name = os.path.basename(path)[:-len(".html")]
+        with open(path, 'rb') as f:
+            html = f.read()
+        expected_path = os.path.join(FIXTURE_DIR, f"{name}.expected.txt")
+        with open(expected_path, encoding='utf-8') as f:
+            expected = f.read().strip()
+        fixtures.append((name, html, expected))
+
+    # Large page: the news article inside the kind of weight real news sites carry
+    # (an inline state blob, a mega-menu and a long list of related links)
+    name, html, expected = next(f for f in fixtures if f[0] == 'news_article')
+    state_blob = b'<script id="__NEXT_DATA__" type="application/json">' + b'{"k":"v"},' * 20000 + b'</script>'
+    mega_menu = b'<nav class="mega-menu">' + b''.join(
+        b'<a href="/section/%d">Section %d</a>' % (i, i) for i in range(1500)
+    ) + b'</nav>'
+    related = b'<div class="related"><ul>' + b''.join(
+        b'<li><a href="/story/%d">Another story you might like, number %d, about chips and models</a></li>' % (i, i)
+        for i in range(300)
+    ) + b'</ul></div>'
+    big = html.replace(b'<body>', b'<body>' + state_blob + mega_menu).replace(b'</main>', b'</main>' + related)
+    fixtures.append((f"{name}_large", big, expected))
+    return fixtures
+
+
+def token_f1(got: str, expected: str):
+    got_tokens = re.findall(r'\w+', got.lower())
+    expected_tokens = re.findall(r'\w+', expected.lower())
+    if not got_tokens or not expected_tokens:
+        return 1.0 if got_tokens == expected_tokens else 0.0
+    remaining = {}
+    for token in expected_tokens:
+        remaining[token] = remaining.get(token, 0) + 1
+    common = 0
+    for token in got_tokens:
+        if remaining.get(token):
+            remaining[token] -= 1
+            common += 1
+    if not common:
+        return 0.0
+    precision = common / len(got_tokens)
+    recall = common / len(expected_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def available_engines():
+    engines = {}
+    for name, func in ENGINES.items():
+        try:
+            func(b"<html><body><p>probe</p></body></html>")
+            engines[name] = func
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    engines = available_engines()
+
+    print(f"{'fixture':<26}{'engine':<10}{'F1':>6}{'ms/page':>10}")
+    totals = {name: [0.0, 0.0] for name in engines}
+    for fixture, html, expected in fixtures:
+        for name, func in engines.items():
+            result = func(html)
+            started = time.perf_counter()
+            for _ in range(args.runs):
+                func(html)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / args.runs
+            f1 = token_f1(result, expected)
+            totals[name][0] += f1
+            totals[name][1] += elapsed_ms
+            print(f"{fixture:<26}{name:<10}{f1:>6.2f}{elapsed_ms:>10.2f}")
+
+    print()
+    for name, (f1_sum, ms_sum) in totals.items():
+        print(f"{name:<10} mean F1 {f1_sum / len(fixtures):.2f}, mean {ms_sum / len(fixtures):.2f} ms/page")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Cold-start import cost of app.py, measured with `python -X importtime`.
+
+Runs app.py's module-level imports (what Streamlit executes before the
+sign-in page can draw) in a fresh interpreter, reports the slowest
+modules, and fails if a heavy SDK is loaded at startup or the total goes
+over budget.
+
+    python benchmarks/bench_import_time.py --top 15 --budget-ms 1500
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs only the generate pipeline needs; none should load before first paint
+DEFERRED_MODULES = ['requests', 'bs4', 'lxml', 'urllib3', 'groq', 'resend', 'supabase', 'httpx',
+                    'streamlit_shadcn_ui', 'utils.scraper', 'utils.ai_curator', 'utils.email_sender',
+                    'utils.database']
+
+
+def startup_imports(path: str):
+    """Source of the import statements at the top level of a script"""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    return '\n'.join(
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def profile_imports(code: str):
+    """[(module, self_us, cumulative_us)] for one cold interpreter run"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the Streamlit app's cold start")
+    parser.add_argument('--script', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--top', type=int, default=15, help="slowest modules to list")
+    parser.add_argument('--runs', type=int, default=3, help="cold runs; the fastest is reported")
+    parser.add_argument('--budget-ms', type=float, default=None, help="fail above this total")
+    args = parser.parse_args()
+
+    code = startup_imports(args.script)
+    print(f"Startup imports of {os.path.relpath(args.script, ROOT)}:\n{code}\n")
+
+    runs = [profile_imports(code) for _ in range(args.runs)]
+    modules = min(runs, key=lambda run: sum(m[1] for m in run))
+    total_ms = sum(m[1] for m in modules) / 1000
+
+    print(f"{'module':<45} {'self ms':>9} {'cumulative ms':>14}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{name[:45]:<45} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}")
+    print(f"\n{len(modules)} modules, {total_ms:.0f} ms total (best of {args.runs})")
+
+    loaded = {name.strip() for name, _, _ in modules}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    failed = False
+    if eager:
+        print(f"❌ Loaded at startup but only needed later: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"❌ Over budget: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ No deferred SDKs at startup")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
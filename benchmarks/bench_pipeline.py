@@ -0,0 +1,405 @@
+"""
+Offline benchmark of the scrape -> curate -> send pipeline.
+
+Every URL in config/sources.py is served by a local stand-in that replays
+the recorded responses in benchmarks/fixtures/pipeline/ (listings) and
+benchmarks/fixtures/html/ (article pages). Groq and Resend are replaced
+with fakes of configurable latency. Each stage runs at several concurrency
+levels. The report gives p50/p95 latency, throughput and peak traced memory.
+
+    python benchmarks/bench_pipeline.py --concurrency 1 4 8 --calls 8 \\
+        --http-latency 0.05 --llm-latency 0.4 --email-latency 0.1
+
+Save a run with --save results.json; rerun later with --compare results.json
+to fail on p95 or throughput regressions beyond --tolerance.
+"""
+
+import argparse
+import contextlib
+import glob
+import itertools
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+# Keep every cache and pool of the run out of the working tree
+CACHE_DIR = tempfile.mkdtemp(prefix="bench-pipeline-")
+os.environ['HTTP_CACHE_DIR'] = CACHE_DIR
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '*'
+sys.path.insert(0, ROOT)
+
+from config import sources  # noqa: E402
+
+# Linked articles are spread over several hosts, as they are live
+ARTICLE_HOSTS = [f"articles-{i}.bench" for i in range(8)]
+
+NEWSLETTER_TEXT = """SUBJECT: This week in {topic}: smaller models, better tools
+SUMMARY: Open-weight models kept closing the gap with frontier systems, and a **new benchmark** for agents showed where they still fail.
+
+Tooling matured too: inference servers got smaller, and evaluation suites got harder to game.
+
+Regulators published draft rules that will shape how automated decisions are audited.
+LEARNING: Most production incidents come from the plumbing around a model, not the model itself.
+ACTION: Add a timeout and a retry budget to one model call in your codebase today.
+"""
+
+
+# --- local HTTP stand-in ----------------------------------------------------
+
+def _tag(*parts):
+    return re.sub(r'[^a-z0-9]+', '-', '-'.join(parts).lower()).strip('-')[:40]
+
+
+def _load(name):
+    with open(os.path.join(FIXTURE_DIR, "pipeline", name), encoding='utf-8') as f:
+        return f.read()
+
+
+class Replay:
+    """Recorded listings and article pages, filled in for the requested URL"""
+
+    def __init__(self, article_bases):
+        self.article_bases = article_bases
+        self.listings = {name: _load(name) for name in
+                         ('hn_search.json', 'reddit_hot.json', 'arxiv_query.xml', 'rss_feed.xml')}
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "html", "*.html"))):
+            with open(path, encoding='utf-8') as f:
+                self.pages.append(f.read())
+
+    def listing(self, host, path, query):
+        if host == 'hn.algolia.com':
+            name, tag, content_type = 'hn_search.json', _tag('hn', *query.get('query', [''])), 'application/json'
+        elif host.endswith('reddit.com'):
+            name, tag, content_type = 'reddit_hot.json', _tag('reddit', path.split('/')[2]), 'application/json'
+        elif host.endswith('arxiv.org'):
+            name, tag, content_type = 'arxiv_query.xml', _tag('arxiv', *query.get('search_query', [''])), 'application/atom+xml'
+        else:
+            name, tag, content_type = 'rss_feed.xml', _tag('rss', host, path), 'application/rss+xml'
+        bases = itertools.cycle(self.article_bases)
+        body = re.sub(r'\{\{base\}\}', lambda m: next(bases), self.listings[name]).replace('{{tag}}', tag)
+        return body.encode('utf-8'), content_type
+
+    def article(self, slug):
+        """A recorded page whose paragraph words are shuffled per slug, so every article is distinct"""
+        rng = random.Random(slug)
+        page = self.pages[rng.randrange(len(self.pages))]
+
+        def shuffle(match):
+            words = match.group(2).split()
+            rng.shuffle(words)
+            return f"{match.group(1)}{' '.join(words)}</p>"
+
+        page = re.sub(r'(<p[^>]*>)([^<]{40,})</p>', shuffle, page)
+        return page.encode('utf-8'), 'text/html; charset=utf-8'
+
+
+class StandIn:
+    """One loopback server per origin host, so per-host limits behave as they do live"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._servers = []
+        self._addresses = {}
+        self._next_ip = 2
+        self._lock = threading.Lock()
+        self.replay = Replay([self.base_for(host) for host in ARTICLE_HOSTS])
+
+    def base_for(self, host):
+        """Base URL that stands in for host; the original host stays in the path"""
+        if host not in self._addresses:
+            server = self._start(host)
+            ip, port = server.server_address[:2]
+            self._addresses[host] = f"http://{ip}:{port}/{host}"
+        return self._addresses[host]
+
+    def rewrite(self, url):
+        parts = urlsplit(url)
+        rewritten = self.base_for(parts.hostname) + parts.path
+        return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+    def _start(self, host):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stand_in._lock:
+                    stand_in.requests += 1
+                time.sleep(stand_in.latency)
+
+                parts = urlsplit(self.path)
+                path = parts.path[len(host) + 1:]
+                if host in ARTICLE_HOSTS:
+                    body, content_type = stand_in.replay.article(path.rsplit('/', 1)[-1])
+                else:
+                    body, content_type = stand_in.replay.listing(host, path, parse_qs(parts.query))
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass    # the scraper stops reading once it has enough
+
+            def log_message(self, *args):
+                pass
+
+        # Distinct loopback addresses give each origin its own host slot
+        try:
+            server = ThreadingHTTPServer((f"127.0.0.{self._next_ip}", 0), Handler)
+            self._next_ip += 1
+        except OSError:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return server
+
+    def install(self):
+        """Point every source in config/sources.py at the stand-in"""
+        for category in sources.NEWS_SOURCES.values():
+            for key in ('web_sources', 'rss_sources', 'api_sources'):
+                category[key] = [self.rewrite(url) for url in category.get(key, [])]
+
+    def close(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+# --- fake Groq and Resend ---------------------------------------------------
+
+class FakeGroq:
+    """Answers every completion with a fixed newsletter after a fixed delay"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += sum(len(m['content']) for m in messages)
+        time.sleep(self.latency)
+        text = NEWSLETTER_TEXT.format(topic=model)
+        if stream:
+            return iter([
+                types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=piece))])
+                for piece in re.findall(r'\S+\s*', text)
+            ])
+        message = types.SimpleNamespace(content=text)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+class FakeResend:
+    """Stands in for the resend module: Emails.send / Batch.send after a fixed delay"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = 0
+        self._lock = threading.Lock()
+        self.Emails = types.SimpleNamespace(send=self._send)
+        self.Batch = types.SimpleNamespace(send=self._send_batch)
+
+    def _send(self, message, options=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.sent += 1
+        return {'id': f"fake-{self.sent}"}
+
+    def _send_batch(self, messages, options=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.sent += len(messages)
+        return {'data': [{'id': f"fake-{i}"} for i in range(len(messages))]}
+
+
+# --- measurement ------------------------------------------------------------
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(call, jobs, concurrency):
+    """Run call(job) for every job, concurrency at a time; returns latencies and wall time"""
+    latencies = []
+
+    def timed(job):
+        start = time.perf_counter()
+        call(job)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, jobs))
+    return latencies, time.perf_counter() - start
+
+
+def peak_memory(call, jobs, concurrency):
+    """Peak traced Python allocations (bytes) for one untimed pass"""
+    tracemalloc.start()
+    try:
+        measure(call, jobs, concurrency)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_stage(name, call, jobs, levels, reset=None):
+    results = []
+    for concurrency in levels:
+        if reset:
+            reset()
+        latencies, wall = measure(call, jobs, concurrency)
+        if reset:
+            reset()
+        peak = peak_memory(call, jobs, concurrency)
+        results.append({
+            'stage': name,
+            'concurrency': concurrency,
+            'calls': len(jobs),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'throughput': len(jobs) / wall,
+            'peak_mb': peak / 1e6,
+        })
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Regressions against a saved run: slower p95 or lower throughput beyond tolerance"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['stage'], r['concurrency']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result['stage'], result['concurrency']))
+        if not before:
+            continue
+        label = f"{result['stage']} @ {result['concurrency']}"
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {before['p95_ms']:.0f} -> {result['p95_ms']:.0f} ms")
+        if result['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {before['throughput']:.1f} -> {result['throughput']:.1f}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scrape -> curate -> send benchmark")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--calls', type=int, default=8, help="calls per stage and concurrency level")
+    parser.add_argument('--articles', type=int, default=5, help="max_articles per scrape")
+    parser.add_argument('--http-latency', type=float, default=0.05, help="stand-in seconds per response")
+    parser.add_argument('--llm-latency', type=float, default=0.4, help="fake Groq seconds per completion")
+    parser.add_argument('--email-latency', type=float, default=0.1, help="fake Resend seconds per send")
+    parser.add_argument('--stages', nargs='+', default=['scrape', 'curate', 'send'])
+    parser.add_argument('--warm', action='store_true', help="keep HTTP, dedup and LLM caches between calls")
+    parser.add_argument('--save', help="write results as JSON")
+    parser.add_argument('--compare', help="JSON from an earlier --save run to check against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed regression (fraction)")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="parse article pages on this many processes, as ingest.py does")
+    args = parser.parse_args()
+
+    stand_in = StandIn(latency=args.http_latency)
+    stand_in.install()
+    groq = FakeGroq(latency=args.llm_latency)
+    resend = FakeResend(latency=args.email_latency)
+
+    # Imported after the environment is set up so caches land in the temp directory
+    from utils import ai_curator, email_sender
+    from utils.scraper import scrape_sources
+    from utils.http_cache import get_cache
+    from utils.dedup import get_processed_index
+    from utils.parse_pool import start_parse_pool, stop_parse_pool
+
+    ai_curator.set_groq_client(groq)
+    start_parse_pool(args.parse_workers)
+    email_sender.set_resend(resend)
+
+    categories = list(sources.NEWS_SOURCES)
+    jobs = [categories[i % len(categories)] for i in range(args.calls)]
+
+    def reset_scrape():
+        if not args.warm:
+            get_cache().clear()
+            get_processed_index().clear()
+
+    def reset_curate():
+        if not args.warm:
+            ai_curator.get_newsletter_cache().clear()
+            ai_curator.get_summary_cache().clear()
+
+    # The pool is bypassed (max_age=0) so every call scrapes through the stand-in
+    def scrape(category):
+        return scrape_sources(category, args.articles, max_age=0)
+
+    results = []
+    try:
+        # The scraper narrates every fetch; keep the report readable
+        with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+            scraped = {category: scrape(category) for category in categories}
+            newsletter = ai_curator.curate_newsletter(scraped[categories[0]], [categories[0]])
+
+            if 'scrape' in args.stages:
+                results += run_stage('scrape', scrape, jobs, args.concurrency, reset_scrape)
+            if 'curate' in args.stages:
+                curate = lambda category: ai_curator.curate_newsletter(scraped[category], [category])
+                results += run_stage('curate', curate, jobs, args.concurrency, reset_curate)
+            if 'send' in args.stages:
+                send = lambda i: email_sender.send_newsletter(f"reader{i}@example.com", newsletter)
+                results += run_stage('send', send, list(range(args.calls)), args.concurrency)
+    finally:
+        stop_parse_pool()
+        stand_in.close()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    articles_found = {category: len(found) for category, found in scraped.items()}
+    print(f"Articles per category: {articles_found}")
+    print(f"Stand-in requests: {stand_in.requests}, fake LLM calls: {groq.calls}, fake emails: {resend.sent}\n")
+    print(f"{'stage':<8} {'conc':>5} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'calls/s':>9} {'peak MB':>9}")
+    for r in results:
+        print(f"{r['stage']:<8} {r['concurrency']:>5} {r['calls']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['throughput']:>9.2f} {r['peak_mb']:>9.2f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ Within {args.tolerance:.0%} of {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
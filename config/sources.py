@@ -80,3 +80,14 @@ NEWS_SOURCES = {
         ]
     }
 }
+
+
+# How long (seconds) a cached response is served without asking the origin again.
+# Older entries are revalidated with ETag / Last-Modified before being refetched.
+CACHE_TTLS = {
+    'api': 5 * 60,          # Hacker News Algolia search
+    'reddit': 5 * 60,       # Reddit hot.json listings
+    'arxiv': 60 * 60,       # arXiv Atom queries
+    'rss': 30 * 60,         # RSS / Atom feeds (revalidated with ETag / Last-Modified)
+    'article': 24 * 60 * 60 # Linked article pages rarely change
+}
@@ -0,0 +1,231 @@
+"""
+Headless batch job that sends the morning newsletter to every subscriber.
+
+Subscribers are grouped by identical topic sets, so scraping runs once per
+topic set. Each reader then gets the group's newest articles they were not
+sent before (see utils/sent_history.py), and curation runs once per
+distinct article set, which in steady state is one per topic set. Every
+email goes through the durable, rate-limited outbox in
+utils/email_queue.py. Scraped candidates and curated newsletters are
+checkpointed under .cache/dispatch/<run id>/ and outbox entries are keyed
+by run id and address, so re-running with the same run id (default:
+today's date) resumes instead of starting over.
+
+    python dispatch.py
+    python dispatch.py --run-id 2024-06-01 --workers 8
+    python dispatch.py --stub      # dry run against the local stub transport
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+
+from utils.http_cache import CACHE_DIR
+from utils.database import iter_all_preferences  # loads .env
+from utils.scraper import scrape_categories, merge_category_articles
+from utils.ai_curator import curate_newsletter
+from utils.email_sender import build_newsletter_email
+from utils.newsletter_template import render_newsletter
+from utils.email_queue import DispatchQueue, Outbox, StubTransport, EMAIL_WORKERS
+from utils.sent_history import get_sent_filters, record_sent_each
+from utils.metrics import write_metrics
+
+ARTICLES_PER_TOPIC = int(os.getenv("DISPATCH_ARTICLES_PER_TOPIC", "5"))
+
+# Extra candidates scraped per topic, to replace articles a reader was already sent
+EXTRA_ARTICLES_PER_TOPIC = int(os.getenv("DISPATCH_EXTRA_ARTICLES_PER_TOPIC", "5"))
+
+
+class Checkpoint:
+    """Scraped candidates per topic set and curated newsletters per article set,
+    so a resumed run neither scrapes nor curates again"""
+
+    def __init__(self, run_id: str):
+        self.directory = os.path.join(CACHE_DIR, "dispatch", run_id)
+        os.makedirs(self.directory, exist_ok=True)
+        self._newsletters_path = os.path.join(self.directory, "newsletters.json")
+        self._articles_path = os.path.join(self.directory, "articles.json")
+        self._candidates_path = os.path.join(self.directory, "candidates.json")
+        self._recipients_path = os.path.join(self.directory, "recipients.json")
+        self._lock = threading.Lock()
+
+        self.newsletters = self._load(self._newsletters_path)
+        self.articles = self._load(self._articles_path)       # set key -> URLs the newsletter was built from
+        self.candidates = self._load(self._candidates_path)   # topic key -> {category: [articles]}
+        self.recipients = self._load(self._recipients_path)   # set key -> emails it was queued for
+
+    @staticmethod
+    def _load(path):
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    @staticmethod
+    def _dump(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def save_newsletter(self, set_key: str, content: str, urls=None):
+        with self._lock:
+            self.articles[set_key] = list(urls or [])
+            self._dump(self._articles_path, self.articles)
+            self.newsletters[set_key] = content
+            self._dump(self._newsletters_path, self.newsletters)
+
+    def save_candidates(self, topic_key: str, candidates: dict):
+        with self._lock:
+            self.candidates[topic_key] = candidates
+            self._dump(self._candidates_path, self.candidates)
+
+    def save_recipients(self, set_key: str, emails: list):
+        """Written before the emails are queued, so a resumed run knows what they were sent"""
+        with self._lock:
+            known = self.recipients.setdefault(set_key, [])
+            known.extend(email for email in emails if email not in known)
+            self._dump(self._recipients_path, self.recipients)
+
+
+def topic_key(topics):
+    return "|".join(sorted(set(topics or [])))
+
+
+def group_subscribers():
+    """Map each distinct topic set to the emails of the readers who chose it"""
+    groups = {}
+    for row in iter_all_preferences():
+        if row.get('email') and row.get('topics'):
+            groups.setdefault(topic_key(row['topics']), []).append(row['email'])
+    return groups
+
+
+def scrape_candidates(topics: list):
+    """One shared fetch plan for all topics, with spare articles per topic; returns {category: [articles]}"""
+    return scrape_categories(topics, ARTICLES_PER_TOPIC + EXTRA_ARTICLES_PER_TOPIC)
+
+
+def pick_articles(candidates: dict, sent_filter=None):
+    """The newest ARTICLES_PER_TOPIC articles per topic the reader was not sent, merged for curation"""
+    picked = {
+        category: [a for a in articles if not sent_filter or a['source'] not in sent_filter][:ARTICLES_PER_TOPIC]
+        for category, articles in candidates.items()
+    }
+    return merge_category_articles(picked)
+
+
+def article_set_key(key: str, articles: list):
+    """Group key plus a digest of the article set; readers with equal keys get the same newsletter"""
+    urls = sorted(article['source'] for article in articles)
+    return f"{key}#{hashlib.sha1(json.dumps(urls).encode('utf-8')).hexdigest()[:12]}"
+
+
+def run(run_id: str, workers=EMAIL_WORKERS, transport=None, outbox=None, record_history=True):
+    """Curate and queue today's newsletters; record_history=False leaves the readers' send history alone"""
+    checkpoint = Checkpoint(run_id)
+    groups = group_subscribers()
+    print(f"👥 {sum(len(emails) for emails in groups.values())} subscribers in {len(groups)} topic groups")
+
+    # Workers start sending while later groups are still being curated
+    queue = DispatchQueue(transport=transport, outbox=outbox, workers=workers)
+    queue.start()
+    queued = skipped = curation_failed = 0
+
+    try:
+        for key, emails in groups.items():
+            topics = key.split("|")
+            done = queue.outbox.queued([f"{run_id}:{email}" for email in emails])
+            pending = [email for email in emails if f"{run_id}:{email}" not in done]
+            skipped += len(emails) - len(pending)
+            filters = get_sent_filters(emails)
+
+            if record_history and done:
+                # An interrupted attempt may have queued readers without recording what they
+                # were sent; recording again is harmless
+                for set_key, recipients in checkpoint.recipients.items():
+                    if set_key.split("#")[0] == key:
+                        resumed = {email: filters.get(email) for email in recipients
+                                   if f"{run_id}:{email}" in done}
+                        record_sent_each(resumed, topics, checkpoint.articles.get(set_key, []))
+            if not pending:
+                continue
+
+            candidates = checkpoint.candidates.get(key)
+            if candidates is None:
+                print(f"📰 Scraping for topics: {key}")
+                try:
+                    candidates = scrape_candidates(topics)
+                except Exception as e:
+                    print(f"❌ Scraping failed for {key}: {e}")
+                    curation_failed += len(pending)
+                    continue
+                checkpoint.save_candidates(key, candidates)
+
+            # Readers left with the same unsent articles share one newsletter
+            article_sets = {}
+            for email in pending:
+                articles = pick_articles(candidates, filters.get(email))
+                article_sets.setdefault(article_set_key(key, articles), (articles, []))[1].append(email)
+
+            for set_key, (articles, readers) in article_sets.items():
+                content = checkpoint.newsletters.get(set_key)
+                if content is None:
+                    print(f"🤖 Curating for topics: {key} ({len(readers)} readers)")
+                    try:
+                        content = curate_newsletter(articles, topics) if articles else None
+                    except Exception as e:
+                        print(f"❌ Curation failed for {key}: {e}")
+                    if not content:
+                        curation_failed += len(readers)
+                        continue
+                    checkpoint.save_newsletter(set_key, content, [article['source'] for article in articles])
+                checkpoint.save_recipients(set_key, readers)
+
+                # Render once per article set; each email only fills in its own fields
+                rendered = render_newsletter(content)
+                sent_to = []
+                for email in readers:
+                    if queue.enqueue(build_newsletter_email(email, content, rendered), f"{run_id}:{email}"):
+                        sent_to.append(email)
+                    else:
+                        skipped += 1
+                queued += len(sent_to)
+                if record_history:
+                    record_sent_each({email: filters.get(email) for email in sent_to},
+                                     topics, checkpoint.articles.get(set_key, []))
+    finally:
+        queue.drain()
+
+    totals = queue.outbox.counts(f"{run_id}:")
+    print(f"✅ Queued {queued} (already queued {skipped}, curation failed {curation_failed}); "
+          f"outbox for this run: {totals}")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send the newsletter to every subscriber")
+    parser.add_argument('--run-id', default=date.today().isoformat(),
+                        help="checkpoint name; re-use it to resume an interrupted run")
+    parser.add_argument('--workers', type=int, default=EMAIL_WORKERS,
+                        help="concurrent email workers")
+    parser.add_argument('--stub', action='store_true',
+                        help="send through the local stub transport instead of Resend")
+    parser.add_argument('--metrics', help="write Prometheus text (or JSON for *.json) here when done")
+    args = parser.parse_args()
+    if args.stub:
+        # Separate outbox so a dry run never marks real addresses as already queued
+        stub_outbox = Outbox(os.path.join(CACHE_DIR, "outbox-stub.sqlite3"))
+        # and never records a send history for real subscribers
+        run(args.run_id, args.workers, StubTransport(), stub_outbox, record_history=False)
+    else:
+        run(args.run_id, args.workers)
+    if args.metrics:
+        write_metrics(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Background ingester that keeps the per-category article pools fresh.
+
+Run it next to the Streamlit app so "Generate My Newsletter" reads
+pre-scraped articles instead of scraping inside the request:
+
+    python ingest.py            # refresh every category on a schedule
+    python ingest.py --once     # single refresh pass, then exit
+    python ingest.py --category AI --interval 300
+    python ingest.py --metrics .cache/metrics.prom   # per-source timings after each pass
+    python ingest.py --parse-workers 8              # article parsing on 8 processes
+"""
+
+import argparse
+import os
+import time
+
+from config.sources import NEWS_SOURCES
+from utils.scraper import scrape_categories_live, POOL_SIZE
+from utils.article_pool import save_pool
+from utils.article_store import get_article_store
+from utils.ai_curator import get_newsletter_cache, get_summary_cache
+from utils.dedup import get_processed_index
+from utils.metrics import write_metrics
+from utils.parse_pool import start_parse_pool, PARSE_WORKERS
+
+INGEST_INTERVAL = int(os.getenv("INGEST_INTERVAL", str(10 * 60)))
+INGEST_DEADLINE = float(os.getenv("INGEST_DEADLINE", "60"))
+
+
+def refresh_categories(categories: list):
+    """Scrape the categories in one shared fetch plan and replace their pools;
+    a category that comes back empty keeps its old pool"""
+    try:
+        results = scrape_categories_live(categories, POOL_SIZE, deadline=INGEST_DEADLINE)
+    except Exception as e:
+        print(f"❌ {', '.join(categories)}: refresh failed: {e}")
+        return
+
+    for category, articles in results.items():
+        if articles:
+            save_pool(category, articles)
+            print(f"📦 {category}: pooled {len(articles)} articles")
+        else:
+            print(f"⚠️ {category}: no articles found, keeping previous pool")
+
+
+def refresh_category(category: str):
+    """Scrape one category and replace its pool; an empty scrape keeps the old pool"""
+    refresh_categories([category])
+
+
+def prune_stores():
+    """Delete expired rows so the on-disk stores stay bounded"""
+    prunes = (
+        ("Article store", lambda: get_article_store().prune()),
+        ("Newsletter cache", lambda: get_newsletter_cache().prune()),
+        ("Summary cache", lambda: get_summary_cache().prune()),
+        ("Processed index", lambda: get_processed_index().prune()),
+    )
+    for name, prune in prunes:
+        try:
+            prune()
+        except Exception as e:
+            print(f"⚠️ {name} prune failed: {e}")
+
+
+def run_once(categories):
+    refresh_categories(categories)
+    prune_stores()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the per-category article pools")
+    parser.add_argument('--once', action='store_true', help="run a single refresh pass and exit")
+    parser.add_argument('--category', action='append', choices=list(NEWS_SOURCES.keys()),
+                        help="category to refresh (repeatable, default: all)")
+    parser.add_argument('--interval', type=int, default=INGEST_INTERVAL,
+                        help="seconds between refresh passes")
+    parser.add_argument('--metrics', help="write Prometheus text (or JSON for *.json) here after each pass")
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                        help="processes that parse article pages (0 parses on the fetch threads)")
+    args = parser.parse_args()
+
+    categories = args.category or list(NEWS_SOURCES.keys())
+    start_parse_pool(args.parse_workers)
+
+    while True:
+        started = time.monotonic()
+        run_once(categories)
+        if args.metrics:
+            write_metrics(args.metrics)
+        if args.once:
+            break
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    main()
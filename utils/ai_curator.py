@@ -1,37 +1,213 @@
-from groq import Groq
 import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def curate_newsletter(articles: list, user_topics: list):
+from utils.prompt_packer import pack_articles, build_context, estimate_tokens, rank_articles, truncate_at_sentence, MAX_ARTICLE_TOKENS
+from utils.llm_cache import LLMCache, make_key
+from utils.dedup import canonicalize_url
+from utils.metrics import span, count
+
+MODEL = "openai/gpt-oss-20b"
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", MODEL)
+
+# Bump whenever a prompt below changes so cached results are not reused
+PROMPT_VERSION = 2
+SUMMARY_PROMPT_VERSION = 1
+
+# "map_reduce" summarises each article once (cached) and composes from the summaries;
+# "single" sends the packed articles in one prompt
+CURATION_MODE = os.getenv("CURATION_MODE", "map_reduce")
+MAX_SUMMARIZED_ARTICLES = int(os.getenv("MAX_SUMMARIZED_ARTICLES", "8"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+_client = None
+_newsletter_cache = None
+_summary_cache = None
+_client_lock = threading.Lock()
+
+NEWSLETTER_FORMAT = """Format your response as:
+SUBJECT: [subject line]
+SUMMARY: [3 paragraphs]
+LEARNING: [key point]
+ACTION: [one specific task]
+"""
+
+def get_groq_client():
+    """Shared Groq client (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from groq import Groq
+            _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return _client
+
+def set_groq_client(client):
+    """Use a stand-in client (e.g. a fake backend in benchmarks); None resets to the real one"""
+    global _client
+    with _client_lock:
+        _client = client
+
+def get_newsletter_cache():
+    """Cache of finished newsletters (created on first use)"""
+    global _newsletter_cache
+    with _client_lock:
+        if _newsletter_cache is None:
+            _newsletter_cache = LLMCache('newsletter')
+        return _newsletter_cache
+
+def get_summary_cache():
+    """Cache of per-article summaries, shared by every user and category"""
+    global _summary_cache
+    with _client_lock:
+        if _summary_cache is None:
+            _summary_cache = LLMCache('article_summary', ttl=SUMMARY_CACHE_TTL, max_entries=1024)
+        return _summary_cache
+
+def content_hash(article: dict):
+    return hashlib.sha256(article.get('content', '').encode('utf-8')).hexdigest()
+
+def newsletter_cache_key(articles: list, user_topics: list, mode=CURATION_MODE):
+    """Cache key for a curation: normalised article set, topics, model, prompt version and mode"""
+    article_set = sorted(
+        (canonicalize_url(a.get('source', ''), resolve_redirects=False), content_hash(a))
+        for a in articles
+    )
+    topics = sorted(t.strip().lower() for t in user_topics)
+    return make_key(article_set, topics, MODEL, PROMPT_VERSION, mode)
+
+def curate_newsletter(articles: list, user_topics: list, mode=None):
     """Use Groq LLM to curate and summarize articles"""
     
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    mode = mode or CURATION_MODE
+    generate = _map_reduce_newsletter if mode == 'map_reduce' else _generate_newsletter
+    key = newsletter_cache_key(articles, user_topics, mode)
+    return get_newsletter_cache().get_or_compute(key, lambda: generate(articles, user_topics))
+
+def _complete(prompt: str, model=MODEL, stage='llm_newsletter'):
+    with span(stage, model):
+        response = get_groq_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    content = response.choices[0].message.content
+    _count_tokens(model, getattr(response, 'usage', None), prompt, content)
+    return content
+
+def _count_tokens(model: str, usage, prompt: str, completion: str):
+    """Token counts from the API's usage block, estimated when it has none"""
+    prompt_tokens = getattr(usage, 'prompt_tokens', None)
+    completion_tokens = getattr(usage, 'completion_tokens', None)
+    count('llm_prompt_tokens', prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt), model=model)
+    count('llm_completion_tokens',
+          completion_tokens if completion_tokens is not None else estimate_tokens(completion or ''), model=model)
+
+def _single_prompt(articles: list, user_topics: list):
+    # Pack the most relevant articles into a bounded context
+    packed = pack_articles(articles, user_topics)
+    context = build_context(packed)
+    print(f"🧮 Packed {len(packed)}/{len(articles)} articles (~{estimate_tokens(context)} tokens)")
+    
+    return f"""You are an AI newsletter curator. Based on these articles about {', '.join(user_topics)}, create:
+
+1. A catchy subject line
+2. A 3-paragraph summary of the most important developments
+3. One key learning point
+4. One action item the reader can do today
+
+Articles:
+{context}
+
+{NEWSLETTER_FORMAT}"""
+
+def _generate_newsletter(articles: list, user_topics: list):
+    return _complete(_single_prompt(articles, user_topics))
+
+def summarize_article(article: dict):
+    """Map step: summarise one article, cached by its content hash"""
+    key = make_key(content_hash(article), SUMMARY_MODEL, SUMMARY_PROMPT_VERSION)
+    
+    def generate():
+        text = truncate_at_sentence(article.get('content', ''), MAX_ARTICLE_TOKENS)
+        prompt = f"""Summarise this article in 2-3 sentences for a newsletter editor.
+Say what is new and why it matters. Reply with the summary only.
+
+Title: {article.get('title', '')}
+
+{text}
+"""
+        return _complete(prompt, model=SUMMARY_MODEL, stage='llm_summary').strip()
+    
+    try:
+        return get_summary_cache().get_or_compute(key, generate)
+    except Exception as e:
+        print(f"   ⚠️ Summary failed for {article.get('source')}: {e}")
+        # Fall back to the article's opening sentences (not cached)
+        return truncate_at_sentence(article.get('content', ''), 80)
+
+def summarize_articles(articles: list):
+    """Summarise articles concurrently; returns (article, summary) pairs in input order"""
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as pool:
+        return list(zip(articles, pool.map(summarize_article, articles)))
+
+def _map_reduce_prompt(articles: list, user_topics: list):
+    # Map: one cached summary per top-ranked article
+    selected = rank_articles(articles, user_topics)[:MAX_SUMMARIZED_ARTICLES]
+    summaries = summarize_articles(selected)
     
-    # Combine articles into context
+    # Reduce: compose the newsletter from the short summaries
     context = "\n\n".join([
-        f"Source: {a['source']}\n{a['content']}" 
-        for a in articles
+        f"Source: {article['source']}\nTitle: {article.get('title', '')}\n{summary}"
+        for article, summary in summaries if summary
     ])
+    print(f"🧮 Composing from {len(summaries)}/{len(articles)} article summaries (~{estimate_tokens(context)} tokens)")
     
-    prompt = f"""You are an AI newsletter curator. Based on these articles about {', '.join(user_topics)}, create:
+    return f"""You are an AI newsletter curator. Based on these article summaries about {', '.join(user_topics)}, create:
 
 1. A catchy subject line
 2. A 3-paragraph summary of the most important developments
 3. One key learning point
 4. One action item the reader can do today
 
-Articles:
+Article summaries:
 {context}
 
-Format your response as:
-SUBJECT: [subject line]
-SUMMARY: [3 paragraphs]
-LEARNING: [key point]
-ACTION: [one specific task]
-"""
+{NEWSLETTER_FORMAT}"""
+
+def _map_reduce_newsletter(articles: list, user_topics: list):
+    return _complete(_map_reduce_prompt(articles, user_topics))
+
+def stream_newsletter(articles: list, user_topics: list, mode=None):
+    """Like curate_newsletter, but yields the newsletter text piece by piece as Groq streams it.
+
+    A cached newsletter is yielded in one piece; a freshly streamed one is
+    cached once complete. Concurrent identical requests share one stream
+    (and one round of map summaries).
+    """
+    mode = mode or CURATION_MODE
+    key = newsletter_cache_key(articles, user_topics, mode)
     
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",
-        messages=[{"role": "user", "content": prompt}],
-    )
+    def produce():
+        build_prompt = _map_reduce_prompt if mode == 'map_reduce' else _single_prompt
+        prompt = build_prompt(articles, user_topics)
+        
+        parts = []
+        usage = None
+        with span('llm_stream', MODEL):
+            stream = get_groq_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            for chunk in stream:
+                # Groq reports usage on the final chunk
+                x_groq = getattr(chunk, 'x_groq', None)
+                usage = getattr(chunk, 'usage', None) or getattr(x_groq, 'usage', None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        _count_tokens(MODEL, usage, prompt, ''.join(parts))
     
-    return response.choices[0].message.content
\ No newline at end of file
+    yield from get_newsletter_cache().stream(key, produce)
@@ -0,0 +1,39 @@
+"""
+Per-category article pool kept fresh by the background ingester (ingest.py),
+backed by the persistent article store
+"""
+
+import os
+import time
+
+from utils.article_store import get_article_store
+
+# Pools older than this (seconds) are ignored and the scraper falls back to a live fetch
+POOL_MAX_AGE = int(os.getenv("ARTICLE_POOL_MAX_AGE", str(30 * 60)))
+
+# Most articles a pool read returns
+POOL_READ_LIMIT = int(os.getenv("ARTICLE_POOL_READ_LIMIT", "100"))
+
+
+def save_pool(category: str, articles: list):
+    """Store a fresh scrape of a category; earlier articles stay queryable until pruned"""
+    get_article_store().add(category, articles)
+
+
+def load_pool(category: str, max_age=None):
+    """Return the articles of the category's latest scrape, newest first, or None if missing or stale"""
+    if max_age is None:
+        max_age = POOL_MAX_AGE
+    store = get_article_store()
+    refreshed_at = store.refreshed_at(category)
+    if refreshed_at is None or time.time() - refreshed_at > max_age:
+        return None
+    # Windowed on when the scrape saw the article, not when it was published:
+    # feeds without dates and slow-moving sources are still part of the pool
+    return store.recent(category, within=None, limit=POOL_READ_LIMIT, seen_since=refreshed_at) or None
+
+
+def get_pool_age(category: str):
+    """Seconds since the pool for a category was refreshed, or None if there is none"""
+    refreshed_at = get_article_store().refreshed_at(category)
+    return None if refreshed_at is None else time.time() - refreshed_at
@@ -0,0 +1,212 @@
+"""
+Persistent local article store: compact records, compressed content, and
+indexed category / publish-time / canonical-URL lookups
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from utils.http_cache import CACHE_DIR
+
+# Articles not seen in any scrape for this long are pruned (seconds)
+ARTICLE_RETENTION = int(os.getenv("ARTICLE_RETENTION", str(30 * 24 * 60 * 60)))
+
+# Default window for "recent" queries (seconds)
+ARTICLE_WINDOW = int(os.getenv("ARTICLE_WINDOW", str(24 * 60 * 60)))
+
+
+class ArticleStore:
+    """SQLite store of scraped articles.
+
+    Hosts and categories are interned into small lookup tables, content is
+    zlib-compressed, and 'published' is normalised to epoch seconds (the
+    first time the article was seen when the source gave no date). The
+    article_categories table is clustered on (category, published), so
+    time-window queries per category are index range scans.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "articles.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS hosts (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS categories (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE,
+                refreshed_at INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                canonical_url TEXT UNIQUE,
+                host_id INTEGER,
+                url TEXT,
+                title TEXT,
+                content BLOB,
+                published INTEGER,
+                first_seen INTEGER,
+                points INTEGER,
+                score INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS article_categories (
+                category_id INTEGER,
+                published INTEGER,
+                article_id INTEGER,
+                last_seen INTEGER,
+                PRIMARY KEY (category_id, published, article_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_article_categories_seen
+                ON article_categories (category_id, last_seen);
+            CREATE INDEX IF NOT EXISTS idx_article_categories_article
+                ON article_categories (article_id);
+        """)
+        self._db.commit()
+        self._hosts = {}
+        self._categories = {}
+
+    def _intern(self, table: str, cache: dict, name: str):
+        """Id for a host or category name, adding it on first use; caller holds the lock"""
+        if name not in cache:
+            self._db.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            cache[name] = self._db.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+        return cache[name]
+
+    def _category_id(self, category: str):
+        """Id of an existing category, or None; caller holds the lock"""
+        if category in self._categories:
+            return self._categories[category]
+        row = self._db.execute("SELECT id FROM categories WHERE name = ?", (category,)).fetchone()
+        if row:
+            self._categories[category] = row[0]
+        return row[0] if row else None
+
+    def add(self, category: str, articles: list, refreshed=True):
+        """Insert or refresh articles under a category; returns their ids in order.
+
+        refreshed marks the category as just scraped (see refreshed_at).
+        """
+        from utils.dedup import canonicalize_url
+        from utils.http_client import get_host
+        from utils.prompt_packer import parse_published
+
+        now = int(time.time())
+        ids = []
+        with self._lock:
+            category_id = self._intern('categories', self._categories, category)
+            for article in articles:
+                url = article.get('source', '')
+                canonical_url = canonicalize_url(url, resolve_redirects=False) or url
+                parsed = parse_published(article.get('published'))
+                published = int(parsed.timestamp()) if parsed else None
+
+                row = self._db.execute(
+                    "SELECT id, published FROM articles WHERE canonical_url = ?", (canonical_url,)
+                ).fetchone()
+                content = zlib.compress((article.get('content') or '').encode('utf-8'))
+                if row:
+                    article_id, published = row[0], published or row[1]
+                    self._db.execute(
+                        "UPDATE articles SET title = ?, content = ?, published = ?, points = ?, score = ? WHERE id = ?",
+                        (article.get('title'), content, published, article.get('points'), article.get('score'), article_id)
+                    )
+                else:
+                    published = published or now
+                    article_id = self._db.execute(
+                        "INSERT INTO articles (canonical_url, host_id, url, title, content, published, first_seen, "
+                        "points, score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (canonical_url, self._intern('hosts', self._hosts, get_host(url)), url,
+                         article.get('title'), content, published, now, article.get('points'), article.get('score'))
+                    ).lastrowid
+
+                # The publish time is part of the key, so replace rather than update
+                self._db.execute(
+                    "DELETE FROM article_categories WHERE category_id = ? AND article_id = ?", (category_id, article_id)
+                )
+                self._db.execute(
+                    "INSERT INTO article_categories VALUES (?, ?, ?, ?)", (category_id, published, article_id, now)
+                )
+                ids.append(article_id)
+
+            if refreshed:
+                self._db.execute("UPDATE categories SET refreshed_at = ? WHERE id = ?", (now, category_id))
+            self._db.commit()
+        return ids
+
+    def refreshed_at(self, category: str):
+        """When the category was last scraped into the store, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT refreshed_at FROM categories WHERE name = ?", (category,)).fetchone()
+        return row[0] if row else None
+
+    def recent(self, category: str, within=ARTICLE_WINDOW, limit=20, seen_since=None):
+        """Newest articles of a category published in the last `within` seconds.
+
+        seen_since keeps only articles some scrape returned at or after that time.
+        """
+        sql = ["SELECT a.id, a.url, a.title, a.content, a.published, a.points, a.score",
+               "FROM article_categories ac JOIN articles a ON a.id = ac.article_id",
+               "WHERE ac.category_id = ? AND ac.published >= ?"]
+        with self._lock:
+            category_id = self._category_id(category)
+            if category_id is None:
+                return []
+            params = [category_id, int(time.time() - within) if within else 0]
+            if seen_since is not None:
+                sql.append("AND ac.last_seen >= ?")
+                params.append(int(seen_since))
+            sql.append("ORDER BY ac.published DESC LIMIT ?")
+            params.append(limit)
+            rows = self._db.execute(" ".join(sql), params).fetchall()
+        return [self._to_article(row) for row in rows]
+
+    def prune(self, older_than=ARTICLE_RETENTION):
+        """Drop articles no scrape has returned for older_than seconds"""
+        cutoff = int(time.time() - older_than)
+        with self._lock:
+            self._db.execute("DELETE FROM article_categories WHERE last_seen < ?", (cutoff,))
+            self._db.execute(
+                "DELETE FROM articles WHERE NOT EXISTS "
+                "(SELECT 1 FROM article_categories ac WHERE ac.article_id = articles.id)"
+            )
+            self._db.commit()
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    @staticmethod
+    def _to_article(row):
+        article_id, url, title, content, published, points, score = row
+        article = {
+            'source': url,
+            'title': title,
+            'content': zlib.decompress(content).decode('utf-8') if content else '',
+            'published': published,
+            'id': article_id,
+        }
+        if points is not None:
+            article['points'] = points
+        if score is not None:
+            article['score'] = score
+        return article
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
@@ -2,18 +2,15 @@
 Supabase authentication utilities for the AI Newsletter MVP
 """
 
-import streamlit as st
-from supabase import create_client
 import os
-from dotenv import load_dotenv
+import threading
+import time
 
-load_dotenv()
+import streamlit as st
+from utils.supabase_client import create_auth_client
 
-# Initialize Supabase client
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Refresh the access token in the background once it is this close to expiring (seconds)
+SESSION_REFRESH_MARGIN = int(os.getenv("SESSION_REFRESH_MARGIN", "300"))
 
 def init_auth():
     """Initialize authentication session state"""
@@ -23,11 +20,15 @@ def init_auth():
         st.session_state.user = None
     if 'user_email' not in st.session_state:
         st.session_state.user_email = None
+    if 'auth_session' not in st.session_state:
+        st.session_state.auth_session = None
+    if 'auth_refresh' not in st.session_state:
+        st.session_state.auth_refresh = None
 
 def sign_up(email: str, password: str):
     """Sign up a new user"""
     try:
-        response = supabase.auth.sign_up({
+        response = create_auth_client().sign_up({
             "email": email,
             "password": password
         })
@@ -52,7 +53,7 @@ def sign_up(email: str, password: str):
 def sign_in(email: str, password: str):
     """Sign in an existing user"""
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = create_auth_client().sign_in_with_password({
             "email": email,
             "password": password
         })
@@ -62,6 +63,8 @@ def sign_in(email: str, password: str):
             st.session_state.authenticated = True
             st.session_state.user = response.user
             st.session_state.user_email = response.user.email
+            if response.session:
+                _remember_session(response.session)
             
             return {
                 "success": True,
@@ -82,11 +85,11 @@ def sign_in(email: str, password: str):
 def sign_out():
     """Sign out the current user"""
     try:
-        supabase.auth.sign_out()
-        # Clear session state
-        st.session_state.authenticated = False
-        st.session_state.user = None
-        st.session_state.user_email = None
+        cached = st.session_state.get('auth_session')
+        if cached:
+            # Revokes the user's refresh tokens server-side
+            create_auth_client().admin.sign_out(cached['access_token'])
+        _clear_auth_state()
         return True
     except Exception as e:
         st.error(f"Error signing out: {str(e)}")
@@ -95,7 +98,7 @@ def sign_out():
 def reset_password(email: str):
     """Send password reset email"""
     try:
-        supabase.auth.reset_password_email(email)
+        create_auth_client().reset_password_email(email)
         return {
             "success": True,
             "message": "Password reset email sent! Check your inbox."
@@ -118,15 +121,70 @@ def get_user_email():
     """Get current user's email"""
     return st.session_state.user_email if st.session_state.authenticated else None
 
+def _clear_auth_state():
+    st.session_state.authenticated = False
+    st.session_state.user = None
+    st.session_state.user_email = None
+    st.session_state.auth_session = None
+    st.session_state.auth_refresh = None
+
+def _remember_session(session):
+    """Keep a validated session and its expiry in session state"""
+    expires_at = session.expires_at or time.time() + (session.expires_in or 3600)
+    st.session_state.auth_session = {
+        'access_token': session.access_token,
+        'refresh_token': session.refresh_token,
+        'expires_at': expires_at
+    }
+    st.session_state.authenticated = True
+    st.session_state.user = session.user
+    st.session_state.user_email = session.user.email
+
+def _refresh_in_background(refresh_token: str):
+    """Start a token refresh; the next rerun picks up the result"""
+    pending = {'session': None, 'done': threading.Event()}
+
+    def refresh():
+        try:
+            response = create_auth_client().refresh_session(refresh_token)
+            pending['session'] = response.session
+        except Exception as e:
+            print(f"Session refresh failed: {e}")
+        finally:
+            pending['done'].set()
+
+    threading.Thread(target=refresh, daemon=True).start()
+    return pending
+
 def handle_auth_state_change():
-    """Handle authentication state changes"""
+    """Handle authentication state changes.
+
+    Runs on every rerun, so a cached session is trusted until it nears
+    expiry; only then is Supabase contacted, and in the background.
+    """
+    pending = st.session_state.get('auth_refresh')
+    if pending and pending['done'].is_set():
+        st.session_state.auth_refresh = None
+        if pending['session']:
+            _remember_session(pending['session'])
+
+    cached = st.session_state.get('auth_session')
+    now = time.time()
+    if cached and cached['expires_at'] > now:
+        if cached['expires_at'] - now < SESSION_REFRESH_MARGIN and not st.session_state.get('auth_refresh'):
+            st.session_state.auth_refresh = _refresh_in_background(cached['refresh_token'])
+        return
+
+    if not cached:
+        return
+
+    # Expired while idle: one blocking refresh, and signed out if it fails
+    session = None
     try:
-        # Check if there's a session in the URL (for email verification)
-        session = supabase.auth.get_session()
-        if session:
-            st.session_state.authenticated = True
-            st.session_state.user = session.user
-            st.session_state.user_email = session.user.email
-    except:
-        # No valid session found
-        pass
+        session = create_auth_client().refresh_session(cached['refresh_token']).session
+    except Exception as e:
+        print(f"Session refresh failed: {e}")
+    if session:
+        _remember_session(session)
+    else:
+        _clear_auth_state()
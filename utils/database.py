@@ -1,41 +1,113 @@
-from supabase import create_client
+import atexit
 import os
-from dotenv import load_dotenv
+import threading
+from utils.supabase_client import get_supabase_client
 
-load_dotenv()
+PREFERENCE_FLUSH_INTERVAL = float(os.getenv("PREFERENCE_FLUSH_INTERVAL", "2"))
+PREFERENCE_BATCH_SIZE = int(os.getenv("PREFERENCE_BATCH_SIZE", "500"))
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Longest wait (seconds) between retries of a flush that keeps failing
+PREFERENCE_MAX_RETRY_DELAY = float(os.getenv("PREFERENCE_MAX_RETRY_DELAY", "60"))
 
 def save_preferences(email: str, topics: list):
-    """Save or update user preferences"""
+    """Save or update user preferences in one round-trip"""
     try:
-        # First check if the email exists
-        existing = supabase.table('user_preference').select('id').eq('email', email).execute()
-
-        if existing.data:
-            # Update existing record
-            data = supabase.table('user_preference').update({
-                'topics': topics
-            }).eq('email', email).execute()
-        else:
-            # Insert new record
-            data = supabase.table('user_preference').insert({
-                'email': email,
-                'topics': topics
-            }).execute()
+        # Needs the unique constraint on user_preference.email
+        get_supabase_client().table('user_preference').upsert({
+            'email': email,
+            'topics': topics
+        }, on_conflict='email').execute()
+        return True
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
 
+def save_preferences_many(rows: list):
+    """Upsert many {'email', 'topics'} rows, PREFERENCE_BATCH_SIZE per request"""
+    try:
+        for start in range(0, len(rows), PREFERENCE_BATCH_SIZE):
+            get_supabase_client().table('user_preference')\
+                .upsert(rows[start:start + PREFERENCE_BATCH_SIZE], on_conflict='email')\
+                .execute()
         return True
     except Exception as e:
         print(f"Error: {e}")
         return False
 
+class PreferenceBuffer:
+    """Write-behind buffer: repeated saves for one email collapse into the latest,
+    and everything pending is flushed as one batch upsert"""
+
+    def __init__(self, interval=PREFERENCE_FLUSH_INTERVAL, max_pending=PREFERENCE_BATCH_SIZE):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._failures = 0
+
+    def _schedule(self, delay):
+        """Start the flush timer unless one is running; caller holds the lock"""
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def add(self, email: str, topics: list):
+        with self._lock:
+            self._pending[email] = list(topics)
+            full = len(self._pending) >= self.max_pending
+            if not full:
+                self._schedule(self.interval)
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; failed rows stay queued unless newer ones replaced them
+        and are retried after a delay that doubles on each failure"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+
+            rows = [{'email': email, 'topics': topics} for email, topics in pending.items()]
+            if save_preferences_many(rows):
+                self._failures = 0
+                return True
+            with self._lock:
+                for email, topics in pending.items():
+                    self._pending.setdefault(email, topics)
+                self._failures += 1
+                self._schedule(min(self.interval * 2 ** self._failures, PREFERENCE_MAX_RETRY_DELAY))
+            return False
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def get_preference_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = PreferenceBuffer()
+            atexit.register(_buffer.flush)
+        return _buffer
+
+def queue_preferences(email: str, topics: list):
+    """Save preferences write-behind; they reach Supabase within PREFERENCE_FLUSH_INTERVAL"""
+    get_preference_buffer().add(email, topics)
+
+def flush_preferences():
+    return get_preference_buffer().flush()
+
 def get_user_preferences(email: str):
     """Get user preferences by email"""
     try:
-        response = supabase.table('user_preference')\
+        response = get_supabase_client().table('user_preference')\
             .select("*")\
             .eq('email', email)\
             .execute()
@@ -43,3 +115,34 @@ def get_user_preferences(email: str):
     except Exception as e:
         print(f"Error: {e}")
         return None
+
+def get_preferences_many(emails: list, chunk_size=200):
+    """Get preferences for many emails in a few requests; returns {email: row}"""
+    found = {}
+    emails = list(dict.fromkeys(emails))
+    try:
+        for start in range(0, len(emails), chunk_size):
+            response = get_supabase_client().table('user_preference')\
+                .select("*")\
+                .in_('email', emails[start:start + chunk_size])\
+                .execute()
+            for row in response.data or []:
+                found[row['email']] = row
+    except Exception as e:
+        print(f"Error: {e}")
+    return found
+
+def iter_all_preferences(page_size=1000):
+    """Yield every user_preference row, one page at a time"""
+    start = 0
+    while True:
+        response = get_supabase_client().table('user_preference')\
+            .select("email, topics")\
+            .order('email')\
+            .range(start, start + page_size - 1)\
+            .execute()
+        rows = response.data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        start += page_size
@@ -0,0 +1,220 @@
+"""
+Cross-source article deduplication: URL canonicalisation and SimHash fingerprints
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.http_cache import CACHE_DIR
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref', 'ref_src',
+    'ref_url', 'cmpid', 'guccounter', 'guce_referrer', 'guce_referrer_sig', 'sr_share',
+    'smid', 'at_medium', 'at_campaign', 'ncid'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'hmb_')
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8              # 8 bands of 8 bits: any fingerprint within 7 bits shares a band
+NEAR_DUPLICATE_DISTANCE = 6    # a few edited words in a 1500-character article stay within this
+
+# Extracted content of an already processed URL is reused for this long (seconds)
+PROCESSED_TTL = int(os.getenv("DEDUP_PROCESSED_TTL", str(3 * 24 * 60 * 60)))
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def canonicalize_url(url: str, resolve_redirects=True):
+    """Normalise a URL so the same story from different sources compares equal.
+
+    Follows redirects already recorded in the HTTP cache, lower-cases the
+    host, drops "www.", default ports, fragments, tracking parameters and
+    trailing slashes, and sorts the remaining query parameters.
+    """
+    if not url:
+        return ''
+
+    if resolve_redirects:
+        try:
+            from utils.http_cache import get_cache
+            url = get_cache().final_url(url) or url
+        except Exception:
+            pass
+
+    parts = urlsplit(url.strip())
+    scheme = 'https' if parts.scheme in ('http', 'https') else parts.scheme
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def _shingles(text: str, size=3):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str):
+    """64-bit SimHash of a text's word 3-shingles"""
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int):
+    return bin(a ^ b).count('1')
+
+
+def _bands(fingerprint: int):
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [(band, fingerprint >> (band * width) & mask) for band in range(SIMHASH_BANDS)]
+
+
+class ProcessedIndex:
+    """Persistent canonical URL -> extracted article index shared across runs"""
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "dedup.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                canonical_url TEXT PRIMARY KEY,
+                simhash TEXT,
+                title TEXT,
+                content TEXT,
+                published TEXT,
+                processed_at REAL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, canonical_url: str, max_age=PROCESSED_TTL):
+        """Previously extracted content for a canonical URL, if recent enough"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM processed WHERE canonical_url = ? AND processed_at > ?",
+                (canonical_url, time.time() - max_age)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, canonical_url: str, article: dict, fingerprint: int):
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?)",
+                    (canonical_url, format(fingerprint, '016x'), article.get('title'),
+                     article.get('content'), article.get('published'), time.time())
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Processed index write skipped for {canonical_url}: {e}")
+
+    def prune(self, older_than=PROCESSED_TTL):
+        """Delete entries too old for get() to return"""
+        with self._lock:
+            self._db.execute("DELETE FROM processed WHERE processed_at <= ?", (time.time() - older_than,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM processed")
+            self._db.commit()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_processed_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProcessedIndex()
+        return _index
+
+
+class ArticleDeduper:
+    """Deduplicates the articles of one scrape run.
+
+    claim() is called before an article body is fetched and rejects URLs
+    that canonicalise to one already seen; accept() is called once the
+    content is known and rejects near-duplicate text. Fingerprints are
+    bucketed by SimHash band, so each check touches only a few entries.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or get_processed_index()
+        self._claimed = set()
+        self._buckets = {}
+        self.skipped = 0
+
+    def claim(self, url: str):
+        """Reserve a URL for this run; returns its canonical form, or None if already taken"""
+        canonical = canonicalize_url(url)
+        return canonical if self.claim_canonical(canonical) else None
+
+    def claim_canonical(self, canonical_url: str):
+        """claim() for an already canonicalised URL; returns False if already taken"""
+        if not canonical_url:
+            return True
+        if canonical_url in self._claimed:
+            self.skipped += 1
+            return False
+        self._claimed.add(canonical_url)
+        return True
+
+    def known_content(self, canonical_url: str):
+        """Content extracted for this canonical URL by an earlier run, if any"""
+        if not canonical_url:
+            return None
+        return self.index.get(canonical_url)
+
+    def accept(self, article: dict, canonical_url=''):
+        """Record an article; returns False if its text near-duplicates one already accepted"""
+        fingerprint = simhash(article.get('content') or article.get('title', ''))
+        bands = _bands(fingerprint)
+
+        for band in bands:
+            for other in self._buckets.get(band, ()):
+                if hamming_distance(fingerprint, other) <= NEAR_DUPLICATE_DISTANCE:
+                    self.skipped += 1
+                    return False
+
+        for band in bands:
+            self._buckets.setdefault(band, []).append(fingerprint)
+        if canonical_url:
+            self.index.record(canonical_url, article, fingerprint)
+        return True
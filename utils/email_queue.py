@@ -0,0 +1,319 @@
+"""
+Durable, rate-limited bulk email dispatch.
+
+Messages are written to an on-disk outbox first, then sent by a pool of
+workers that share a token bucket matched to the provider's request rate.
+Each batch keeps the same idempotency key across retries and restarts, so
+a crash between "sent" and "marked as sent" cannot deliver twice.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.http_cache import CACHE_DIR
+from utils.metrics import span, count
+
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "4"))
+EMAIL_RATE_PER_SECOND = float(os.getenv("EMAIL_RATE_PER_SECOND", "2"))   # Resend's default API limit
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))             # Resend batch maximum
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 5 * 60
+
+# Provider errors that will not go away by retrying
+PERMANENT_ERROR_CODES = {400, 401, 403, 404, 422}
+
+
+class TokenBucket:
+    """Blocking token bucket: rate tokens per second, bursts up to capacity"""
+
+    def __init__(self, rate: float, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResendTransport:
+    """Sends through Resend, using the batch endpoint for more than one message"""
+
+    supports_batch = True
+
+    def send(self, messages: list, idempotency_key: str):
+        """Send messages; returns the indexes the provider rejected"""
+        from utils.email_sender import get_resend
+        resend = get_resend()
+
+        if len(messages) == 1:
+            resend.Emails.send(messages[0], {"idempotency_key": idempotency_key})
+            return []
+
+        response = resend.Batch.send(messages, {
+            "idempotency_key": idempotency_key,
+            "batch_validation": "permissive"
+        })
+        errors = response.get('errors') if isinstance(response, dict) else None
+        return [error.get('index') for error in errors or []]
+
+
+class StubTransport:
+    """Local stand-in for throughput tests: records messages after a configurable delay"""
+
+    def __init__(self, latency=0.05, failure_rate=0.0, supports_batch=True):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.supports_batch = supports_batch
+        self.sent = []
+        self.requests = 0
+        self._seen_keys = set()
+        self._lock = threading.Lock()
+
+    def send(self, messages: list, idempotency_key: str):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise ConnectionError("stub transport failure")
+        with self._lock:
+            self.requests += 1
+            # Behave like the provider: a repeated idempotency key is not delivered again
+            if idempotency_key not in self._seen_keys:
+                self._seen_keys.add(idempotency_key)
+                self.sent.extend(messages)
+        return []
+
+
+def is_permanent_error(error):
+    try:
+        return int(getattr(error, 'code', 0)) in PERMANENT_ERROR_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait, if it said so"""
+    headers = getattr(error, 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class Outbox:
+    """SQLite-backed queue of messages with their delivery state"""
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "outbox.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedupe_key TEXT UNIQUE,
+                message TEXT,
+                status TEXT DEFAULT 'pending',
+                batch_key TEXT,
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL,
+                sent_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_batch ON outbox (batch_key)")
+        self._db.commit()
+
+    def enqueue(self, message: dict, dedupe_key: str):
+        """Add a message unless one with the same key was ever queued; returns True if added"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO outbox (dedupe_key, message, created_at) VALUES (?, ?, ?)",
+                (dedupe_key, json.dumps(message), time.time())
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+
+    def recover(self):
+        """Put messages a crashed worker left in 'sending' back in the queue (same batch key)"""
+        with self._lock:
+            self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+            self._db.commit()
+
+    def claim(self, limit: int):
+        """Reserve the next due batch; returns (batch_key, [(id, message, attempts)])"""
+        now = time.time()
+        with self._lock:
+            # Retries go out as the same batch with the same idempotency key
+            row = self._db.execute(
+                "SELECT batch_key FROM outbox WHERE status = 'pending' AND batch_key IS NOT NULL "
+                "AND next_attempt_at <= ? LIMIT 1", (now,)
+            ).fetchone()
+            if row:
+                batch_key = row[0]
+                rows = self._db.execute(
+                    "SELECT id, message, attempts FROM outbox WHERE batch_key = ? AND status = 'pending'",
+                    (batch_key,)
+                ).fetchall()
+            else:
+                batch_key = uuid.uuid4().hex
+                rows = self._db.execute(
+                    "SELECT id, message, attempts FROM outbox WHERE status = 'pending' AND batch_key IS NULL "
+                    "AND next_attempt_at <= ? ORDER BY id LIMIT ?", (now, limit)
+                ).fetchall()
+            if not rows:
+                return None, []
+
+            self._db.executemany(
+                "UPDATE outbox SET status = 'sending', batch_key = ? WHERE id = ?",
+                [(batch_key, r[0]) for r in rows]
+            )
+            self._db.commit()
+        return batch_key, [(r[0], json.loads(r[1]), r[2]) for r in rows]
+
+    def _update(self, sql, params):
+        with self._lock:
+            self._db.executemany(sql, params)
+            self._db.commit()
+
+    def mark_sent(self, ids):
+        now = time.time()
+        self._update("UPDATE outbox SET status = 'sent', sent_at = ? WHERE id = ?", [(now, i) for i in ids])
+
+    def mark_failed(self, ids, error: str):
+        self._update("UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?", [(error, i) for i in ids])
+
+    def retry_later(self, ids, attempts: int, delay: float, error: str):
+        self._update(
+            "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            [(attempts, time.time() + delay, error, i) for i in ids]
+        )
+
+    def has_work(self):
+        """(anything pending or in flight, seconds until the next pending message is due)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*), MIN(CASE WHEN status = 'pending' THEN next_attempt_at END) "
+                "FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+        count, next_due = row
+        return count > 0, max(0.0, (next_due or 0) - time.time())
+
+    def queued(self, dedupe_keys: list, chunk_size=500):
+        """The subset of dedupe_keys that were ever enqueued"""
+        found = set()
+        with self._lock:
+            for start in range(0, len(dedupe_keys), chunk_size):
+                chunk = dedupe_keys[start:start + chunk_size]
+                rows = self._db.execute(
+                    f"SELECT dedupe_key FROM outbox WHERE dedupe_key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def counts(self, key_prefix=''):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM outbox WHERE dedupe_key LIKE ? GROUP BY status",
+                (key_prefix + '%',)
+            ).fetchall()
+        return dict(rows)
+
+
+class DispatchQueue:
+    """Worker pool draining the outbox through a rate-limited transport"""
+
+    def __init__(self, transport=None, outbox=None, workers=EMAIL_WORKERS, rate=EMAIL_RATE_PER_SECOND,
+                 batch_size=EMAIL_BATCH_SIZE, max_attempts=EMAIL_MAX_ATTEMPTS):
+        self.transport = transport or ResendTransport()
+        self.outbox = outbox or Outbox()
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.batch_size = batch_size if self.transport.supports_batch else 1
+        self.max_attempts = max_attempts
+        self._threads = []
+        self._closing = threading.Event()
+
+    def enqueue(self, message: dict, dedupe_key: str):
+        return self.outbox.enqueue(message, dedupe_key)
+
+    def start(self):
+        """Start the workers; they keep polling the outbox until drain() is called"""
+        self.outbox.recover()
+        self._closing.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"email-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def drain(self):
+        """Wait until every queued message is sent or has failed for good"""
+        self._closing.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def run(self):
+        self.start()
+        self.drain()
+
+    def _work(self):
+        while True:
+            batch_key, batch = self.outbox.claim(self.batch_size)
+            if not batch:
+                busy, wait = self.outbox.has_work()
+                if not busy and self._closing.is_set():
+                    return
+                time.sleep(min(max(wait, 0.05), 1.0))
+                continue
+
+            self.bucket.acquire()
+            ids = [item[0] for item in batch]
+            try:
+                with span('email_batch', type(self.transport).__name__):
+                    rejected = self.transport.send([item[1] for item in batch], batch_key) or []
+                rejected_ids = {ids[i] for i in rejected if i is not None and 0 <= i < len(ids)}
+                count('emails_sent', len(ids) - len(rejected_ids))
+                count('emails_rejected', len(rejected_ids))
+                self.outbox.mark_sent([i for i in ids if i not in rejected_ids])
+                if rejected_ids:
+                    self.outbox.mark_failed(list(rejected_ids), "rejected by provider")
+            except Exception as e:
+                self._handle_failure(batch, e)
+
+    def _handle_failure(self, batch, error):
+        ids = [item[0] for item in batch]
+        attempts = max(item[2] for item in batch) + 1
+        if is_permanent_error(error) or attempts >= self.max_attempts:
+            print(f"   ❌ Giving up on {len(ids)} emails: {error}")
+            self.outbox.mark_failed(ids, str(error))
+            return
+
+        # Exponential backoff with full jitter, unless the provider named a delay
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempts))
+        print(f"   ⚠️ Email batch failed ({error}); retry {attempts} in {delay:.1f}s")
+        self.outbox.retry_later(ids, attempts, delay, str(error))
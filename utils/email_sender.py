@@ -1,37 +1,59 @@
-import resend
 import os
+import threading
 
-resend.api_key = os.getenv("RESEND_API_KEY")
+from utils.newsletter_template import render_newsletter, unsubscribe_url_for
+from utils.metrics import span, count
+
+SENDER = "onboarding@resend.dev"  # Resend test domain
+
+_resend = None
+_resend_lock = threading.Lock()
+
+def get_resend():
+    """The resend SDK, imported and configured on first send"""
+    global _resend
+    with _resend_lock:
+        if _resend is None:
+            import resend
+            resend.api_key = os.getenv("RESEND_API_KEY")
+            _resend = resend
+        return _resend
+
+def set_resend(client):
+    """Use a stand-in for the resend module (e.g. a fake backend in benchmarks); None resets it"""
+    global _resend
+    with _resend_lock:
+        _resend = client
+
+def build_newsletter_email(to_email: str, content: str, rendered=None):
+    """Build the Resend message for a curated newsletter.
+
+    Pass a RenderedNewsletter when sending the same newsletter to many
+    recipients so it is parsed and rendered only once.
+    """
+    if rendered is None:
+        rendered = render_newsletter(content)
+    
+    message = {
+        "from": SENDER,
+        "to": to_email,
+        "subject": rendered.subject,
+        "html": rendered.html_for(to_email)
+    }
+    unsubscribe_url = unsubscribe_url_for(to_email)
+    if unsubscribe_url:
+        message["headers"] = {"List-Unsubscribe": f"<{unsubscribe_url}>"}
+    return message
 
 def send_newsletter(to_email: str, content: str):
     """Send the curated newsletter via email"""
     
-    # Parse content (simple splitting)
-    lines = content.split('\n')
-    subject = next((l.replace('SUBJECT:', '').strip() for l in lines if 'SUBJECT:' in l), 'Your AI Newsletter')
-    
-    # Process content for HTML
-    processed_content = content.replace('SUMMARY:', '<h2>Summary</h2>').replace('LEARNING:', '<h2>Key Learning</h2>').replace('ACTION:', '<h2>Today\'s Action</h2>')
-    
-    html_content = f"""
-    <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <h1 style="color: #2563eb;">📰 Your Personalized AI Newsletter</h1>
-            <div style="background: #f3f4f6; padding: 20px; border-radius: 8px;">
-                {processed_content}
-            </div>
-        </body>
-    </html>
-    """
-    
-    try:
-        resend.Emails.send({
-            "from": "onboarding@resend.dev",  # Resend test domain
-            "to": to_email,
-            "subject": subject,
-            "html": html_content
-        })
-        return True
-    except Exception as e:
-        print(f"Email error: {e}")
-        return False
\ No newline at end of file
+    with span('email', 'resend') as outcome:
+        try:
+            get_resend().Emails.send(build_newsletter_email(to_email, content))
+            count('emails_sent')
+            return True
+        except Exception as e:
+            outcome['ok'], outcome['error'] = False, e
+            print(f"Email error: {e}")
+            return False
@@ -0,0 +1,376 @@
+"""
+Article text extraction engines.
+
+The default "density" engine walks the HTML once with the stdlib HTMLParser,
+scores every block that holds paragraphs by how much non-link text it
+carries, and keeps the paragraphs of the best block. When lxml is installed
+the "lxml" engine does the same scoring on a C-built tree. The old
+BeautifulSoup selector cascade is kept as "cascade" for comparison.
+"""
+
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+# Same limits the scraper has always used
+MAX_PARAGRAPHS = 5
+MIN_PARAGRAPH_CHARS = 50
+MIN_CONTENT_CHARS = 200
+MIN_META_CHARS = 100
+
+# Never parse more than this many bytes of a page
+MAX_HTML_BYTES = int(os.getenv("EXTRACTOR_MAX_BYTES", str(512 * 1024)))
+
+# Streaming extraction stops once one block holds this much paragraph text
+ENOUGH_TEXT_CHARS = 1500
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'nav', 'header', 'footer', 'aside', 'form', 'button'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+PARAGRAPH_TAGS = {'p'}
+INLINE_TAGS = {'a', 'abbr', 'b', 'cite', 'code', 'em', 'i', 'mark', 's', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u'}
+
+POSITIVE_HINTS = re.compile(r'article|content|story|post|entry|body|main|text', re.I)
+NEGATIVE_HINTS = re.compile(r'comment|sidebar|footer|nav|promo|related|share|social|advert|subscribe|cookie|menu', re.I)
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _clean(text: str):
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _container_weight(hint: str):
+    weight = 1.0
+    if hint and POSITIVE_HINTS.search(hint):
+        weight *= 1.25
+    if hint and NEGATIVE_HINTS.search(hint):
+        weight *= 0.5
+    return weight
+
+
+def pick_paragraphs(paragraphs, hints):
+    """Choose the highest-scoring block and return its leading paragraphs.
+
+    paragraphs: list of (text, link_chars, parent_key, grandparent_key) in document order
+    hints: container key -> "class id" string used for the weighting
+    """
+    scores = {}
+    for text, link_chars, parent, grandparent in paragraphs:
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = len(text) - 2 * link_chars
+        if score <= 0:
+            continue
+        scores[parent] = scores.get(parent, 0) + score
+        if grandparent is not None:
+            # Wrapper blocks pass their paragraphs up, weighted by their own hints
+            weight = _container_weight(hints.get(parent, ''))
+            scores[grandparent] = scores.get(grandparent, 0) + score * weight / 2
+
+    if not scores:
+        return ''
+
+    best = max(scores, key=lambda key: scores[key] * _container_weight(hints.get(key, '')))
+
+    parts = []
+    for text, link_chars, parent, grandparent in paragraphs:
+        if (parent == best or grandparent == best) and len(text) > MIN_PARAGRAPH_CHARS:
+            parts.append(text)
+            if len(parts) >= MAX_PARAGRAPHS:
+                break
+
+    content = ' '.join(parts)
+    return content if len(content) > MIN_CONTENT_CHARS else ''
+
+
+def _fallback_text(meta_description: str, text_blocks):
+    if meta_description and len(meta_description) > MIN_META_CHARS:
+        return meta_description
+    lines = [block for block in text_blocks if len(block) > MIN_PARAGRAPH_CHARS]
+    return ' '.join(lines[:3])
+
+
+class DensityParser(HTMLParser):
+    """Single-pass paragraph collector; can be fed incrementally"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self.hints = {}
+        self.text_blocks = []
+        self.meta_description = ''
+        self._stack = []          # (tag, element id)
+        self._next_id = 0
+        self._skip_depth = 0
+        self._paragraph = None    # [chunks, link_chars, parent, grandparent]
+        self._link_depth = 0
+        self._block_text = []
+        self._block_totals = {}   # container id -> [paragraph count, chars]
+
+    # Stack helpers
+    def _close_to(self, tag):
+        while self._stack:
+            open_tag, _ = self._stack.pop()
+            self._on_close(open_tag)
+            if open_tag == tag:
+                break
+
+    def _on_close(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'a':
+            self._link_depth = max(0, self._link_depth - 1)
+        elif tag in PARAGRAPH_TAGS and self._paragraph is not None:
+            chunks, link_chars, parent, grandparent = self._paragraph
+            text = _clean(''.join(chunks))
+            if text:
+                self.paragraphs.append((text, link_chars, parent, grandparent))
+                if len(text) > MIN_PARAGRAPH_CHARS:
+                    self._count_paragraph(text, parent, grandparent)
+            self._paragraph = None
+        if tag not in INLINE_TAGS:
+            self._flush_block()
+
+    def _count_paragraph(self, text, parent, grandparent):
+        for key in (parent, grandparent):
+            if key is None or NEGATIVE_HINTS.search(self.hints.get(key, '')):
+                continue
+            totals = self._block_totals.setdefault(key, [0, 0])
+            totals[0] += 1
+            totals[1] += len(text)
+
+    def has_enough_text(self, min_chars=ENOUGH_TEXT_CHARS):
+        """True once a single block holds all the paragraphs (or text) the scraper keeps"""
+        return any(
+            count >= MAX_PARAGRAPHS or chars >= min_chars
+            for count, chars in self._block_totals.values()
+        )
+
+    def _flush_block(self):
+        if self._block_text:
+            text = _clean(''.join(self._block_text))
+            if text:
+                self.text_blocks.append(text)
+            self._block_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('name') or attrs.get('property') or '').lower()
+            if name in ('description', 'og:description') and not self.meta_description:
+                self.meta_description = _clean(attrs.get('content') or '')
+            return
+        if tag in VOID_TAGS:
+            return
+        if tag in PARAGRAPH_TAGS and self._paragraph is not None:
+            # <p> implicitly closes an open <p>
+            self._close_to(tag)
+
+        element_id = self._next_id
+        self._next_id += 1
+        attrs = dict(attrs)
+        hint = f"{attrs.get('class') or ''} {attrs.get('id') or ''}".strip()
+        if hint:
+            self.hints[element_id] = hint
+
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a':
+            self._link_depth += 1
+        elif tag in PARAGRAPH_TAGS and not self._skip_depth:
+            parent = self._stack[-1][1] if self._stack else None
+            grandparent = self._stack[-2][1] if len(self._stack) > 1 else None
+            self._paragraph = [[], 0, parent, grandparent]
+
+        if tag not in INLINE_TAGS:
+            self._flush_block()
+        self._stack.append((tag, element_id))
+
+    def handle_endtag(self, tag):
+        if any(open_tag == tag for open_tag, _ in self._stack):
+            self._close_to(tag)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._block_text.append(data)
+        if self._paragraph is not None:
+            self._paragraph[0].append(data)
+            if self._link_depth:
+                self._paragraph[1] += len(data.strip())
+
+    def result(self):
+        self._close_to(None)
+        content = pick_paragraphs(self.paragraphs, self.hints)
+        return content or _fallback_text(self.meta_description, self.text_blocks)
+
+
+def _to_text(html):
+    if isinstance(html, bytes):
+        return html[:MAX_HTML_BYTES].decode('utf-8', errors='replace')
+    return html[:MAX_HTML_BYTES]
+
+
+def extract_density(html):
+    """One-pass text-density extraction with the stdlib parser"""
+    parser = DensityParser()
+    parser.feed(_to_text(html))
+    parser.close()
+    return parser.result()
+
+
+def is_html_content_type(content_type):
+    """Whether a Content-Type header is worth parsing (a missing header is given the benefit of the doubt)"""
+    if not content_type:
+        return True
+    return content_type.split(';')[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def charset_from_content_type(content_type, default='utf-8'):
+    match = re.search(r'charset=["\']?([\w-]+)', content_type or '', re.I)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return default
+
+
+def extract_from_chunks(chunks, max_bytes=MAX_HTML_BYTES, encoding='utf-8', engine=None):
+    """Extract article text from a page arriving as byte chunks.
+
+    Chunks are decoded and fed to the density parser as they come in;
+    reading stops at max_bytes or as soon as one block holds enough
+    paragraph text, so the rest of the page is never downloaded. With
+    another engine selected (EXTRACTOR_ENGINE, or lxml when installed) the
+    density parser only decides when to stop, and that engine extracts the
+    text from what was read.
+    """
+    engine = engine or DEFAULT_ENGINE
+    parser = DensityParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    received = []
+    size = 0
+
+    for chunk in chunks:
+        chunk = chunk[:max_bytes - size]
+        size += len(chunk)
+        text = decoder.decode(chunk)
+        parser.feed(text)
+        if engine != 'density':
+            received.append(text)
+        if size >= max_bytes or parser.has_enough_text():
+            break
+
+    if engine != 'density':
+        received.append(decoder.decode(b'', final=True))
+        return extract_content(''.join(received), engine)
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return parser.result()
+
+
+def extract_lxml(html):
+    """Text-density extraction on an lxml tree (same scoring as extract_density)"""
+    import lxml.html
+
+    if isinstance(html, bytes):
+        html = html[:MAX_HTML_BYTES]
+    else:
+        html = html[:MAX_HTML_BYTES].encode('utf-8')
+    tree = lxml.html.fromstring(html)
+
+    for element in list(tree.iter(*SKIP_TAGS)):
+        element.drop_tree()
+
+    hints = {}
+    paragraphs = []
+    for p in tree.iter('p'):
+        text = _clean(p.text_content())
+        if not text:
+            continue
+        link_chars = sum(len(a.text_content().strip()) for a in p.iter('a'))
+        parent = p.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for element in (parent, grandparent):
+            if element is not None and element not in hints:
+                hints[element] = f"{element.get('class') or ''} {element.get('id') or ''}".strip()
+        paragraphs.append((text, link_chars, parent, grandparent))
+
+    content = pick_paragraphs(paragraphs, hints)
+    if content:
+        return content
+
+    meta = tree.xpath('//meta[@name="description"]/@content | //meta[@property="og:description"]/@content')
+    blocks = [_clean(line) for line in tree.text_content().split('\n')]
+    return _fallback_text(_clean(meta[0]) if meta else '', blocks)
+
+
+def extract_cascade(html):
+    """The original BeautifulSoup selector cascade (kept for benchmarks)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    content_selectors = [
+        '.article-body p', '.story-body p', '.article-content p', '.post-content p',
+        '.entry-content p', '.content p', '.story p', '.article p', 'article p',
+        'main p', '.main p', 'p'
+    ]
+
+    for selector in content_selectors:
+        paragraphs = soup.select(selector)
+        if paragraphs:
+            content_parts = []
+            for p in paragraphs[:5]:
+                text = p.get_text(strip=True)
+                if len(text) > 50:
+                    content_parts.append(text)
+
+            if content_parts and len(' '.join(content_parts)) > 200:
+                return ' '.join(content_parts)
+
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        desc = meta_desc.get('content').strip()
+        if len(desc) > 100:
+            return desc
+
+    text = soup.get_text()
+    if len(text) > 100:
+        lines = text.split('\n')
+        clean_lines = [line.strip() for line in lines if len(line.strip()) > 50]
+        if clean_lines:
+            return ' '.join(clean_lines[:3])
+
+    return ""
+
+
+ENGINES = {
+    'density': extract_density,
+    'lxml': extract_lxml,
+    'cascade': extract_cascade,
+}
+
+
+def _default_engine():
+    configured = os.getenv("EXTRACTOR_ENGINE")
+    if configured:
+        return configured
+    try:
+        import lxml.html  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'density'
+
+
+DEFAULT_ENGINE = _default_engine()
+
+
+def extract_content(html, engine=None):
+    """Extract the main article text from an HTML page with the chosen engine"""
+    return ENGINES[engine or DEFAULT_ENGINE](html)
@@ -0,0 +1,82 @@
+"""
+Incremental RSS / Atom feed parsing
+"""
+
+import html
+import re
+from xml.etree import ElementTree as ET
+
+# Tags that carry an entry's full body, matched with their namespace:
+# media:content shares the local name but is an empty element with a url
+CONTENT_TAGS = {
+    '{http://purl.org/rss/1.0/modules/content/}encoded',
+    '{http://www.w3.org/2005/Atom}content',
+    'content',
+}
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _local(tag: str):
+    """Strip the XML namespace from a tag name"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def clean_feed_text(text: str):
+    """Turn an HTML-ish feed description into plain text"""
+    if not text:
+        return ''
+    text = html.unescape(_TAG_RE.sub(' ', text))
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _entry_to_item(elem):
+    item = {'title': '', 'link': '', 'summary': '', 'content': '', 'published': None}
+
+    for child in elem:
+        name = _local(child.tag)
+        text = child.text or ''
+        if name == 'title':
+            item['title'] = clean_feed_text(text)
+        elif name == 'link':
+            # RSS puts the URL in the text, Atom in href (prefer rel="alternate")
+            href = child.get('href')
+            if href and child.get('rel', 'alternate') == 'alternate':
+                item['link'] = href
+            elif text.strip() and not item['link']:
+                item['link'] = text.strip()
+        elif name in ('description', 'summary'):
+            item['summary'] = clean_feed_text(text)
+        elif child.tag in CONTENT_TAGS:
+            content = clean_feed_text(text)
+            if content:
+                item['content'] = content
+        elif name in ('pubDate', 'published', 'updated', 'date') and not item['published']:
+            item['published'] = text.strip() or None
+
+    return item
+
+
+def iter_feed_items(chunks, max_items=10):
+    """Yield RSS <item> / Atom <entry> dicts from an iterable of byte chunks.
+
+    The document is fed to a pull parser as it arrives and each entry is
+    cleared once read, so parsing stops (and the caller can stop
+    downloading) as soon as max_items entries have been produced.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    produced = 0
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if _local(elem.tag) not in ('item', 'entry'):
+                continue
+            item = _entry_to_item(elem)
+            elem.clear()
+            if item['title'] and item['link']:
+                yield item
+                produced += 1
+                if produced >= max_items:
+                    return
@@ -0,0 +1,198 @@
+"""
+Persistent on-disk HTTP response cache shared by every scraper fetch
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".cache")
+MAX_CACHE_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+
+class CachedResponse:
+    """Minimal response object served from the cache or wrapped around a live response"""
+
+    def __init__(self, url, status_code, headers, content, final_url=None, from_cache=False, revalidated=False):
+        self.url = final_url or url
+        self.requested_url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.content = content or b''
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+
+    @property
+    def sent_request(self):
+        """False when the cache answered without asking the server"""
+        return not self.from_cache or self.revalidated
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HttpCache:
+    """SQLite-backed response store with LRU eviction once max_bytes is exceeded"""
+
+    def __init__(self, path=None, max_bytes=MAX_CACHE_BYTES):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "http_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Shared by ingest.py, dispatch.py and the app: WAL lets readers run during writes
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+        """)
+        try:
+            # Bodies cut short by a streaming reader are kept, flagged, and never revalidated
+            self._db.execute("ALTER TABLE responses ADD COLUMN complete INTEGER DEFAULT 1")
+        except sqlite3.OperationalError:
+            pass    # already there
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._db.commit()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+    def lookup(self, url: str):
+        """Return the cached entry for a URL as a dict, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT final_url, status, headers, body, etag, last_modified, fetched_at, complete "
+                "FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'final_url': row[0],
+            'status': row[1],
+            'headers': json.loads(row[2] or '{}'),
+            'body': row[3],
+            'etag': row[4],
+            'last_modified': row[5],
+            'fetched_at': row[6],
+            'complete': row[7] is None or bool(row[7]),
+        }
+
+    def final_url(self, url: str):
+        """Where a cached request for url ended up after redirects, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT final_url FROM responses WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, url: str, revalidated=False):
+        """Mark an entry as recently used; a revalidation also resets its age"""
+        now = time.time()
+        try:
+            with self._lock:
+                if revalidated:
+                    self._db.execute(
+                        "UPDATE responses SET accessed_at = ?, fetched_at = ? WHERE url = ?", (now, now, url)
+                    )
+                else:
+                    self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache update skipped for {url}: {e}")
+
+    def store(self, url: str, response, complete=True):
+        """Store a live response, then evict least recently used entries if over budget.
+
+        complete=False marks a body the reader stopped early. Its ETag /
+        Last-Modified are kept, but lookups flag it incomplete and only
+        readers that stop at the same point accept it (see open_stream), so a
+        304 never hands the prefix to one that wants the whole body.
+
+        Best-effort: a write that fails (e.g. the database is locked by
+        another process) is logged and dropped, never raised to the fetch.
+        """
+        try:
+            self._store(url, response, complete)
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache write skipped for {url}: {e}")
+
+    def _store(self, url: str, response, complete):
+        headers = dict(response.headers)
+        body = response.content or b''
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, final_url, status, headers, body, etag, last_modified, fetched_at, accessed_at, size, "
+                "complete) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.url, response.status_code, json.dumps(headers), body,
+                 headers.get('ETag') or headers.get('etag'),
+                 headers.get('Last-Modified') or headers.get('last-modified'),
+                 now, now, len(body), int(complete))
+            )
+            self.stats['stored'] += 1
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        while total > self.max_bytes:
+            row = self._db.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if not row:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (row[0],))
+            total -= row[1]
+            self.stats['evicted'] += 1
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Get the process-wide HTTP cache, creating it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def get_cache_stats():
+    """Hit/miss counters for the shared cache"""
+    return dict(get_cache().stats)
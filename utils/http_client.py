@@ -0,0 +1,243 @@
+"""
+Shared HTTP plumbing for the scraper: keep-alive sessions per host and per-host concurrency caps
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+# How many requests may be in flight against a single host at once
+PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST_LIMIT", "4"))
+
+_sessions = {}
+_host_slots = {}
+_lock = threading.Lock()
+
+
+def get_host(url: str):
+    """Return the lower-cased host part of a URL"""
+    return (urlparse(url).hostname or '').lower()
+
+
+def get_session(host: str):
+    """Get (or create) the keep-alive session used for a host"""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PER_HOST_LIMIT)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _sessions[host] = session
+        return session
+
+
+def _get_host_slot(host: str):
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(PER_HOST_LIMIT)
+            _host_slots[host] = slot
+        return slot
+
+
+class HostBackoff(requests.RequestException):
+    """The host asked us to slow down (429); the request was not sent"""
+
+
+def _backoff_remaining(url: str):
+    from utils.source_health import HEALTH_ENABLED, get_source_health
+
+    return get_source_health().retry_in(get_host(url)) if HEALTH_ENABLED else 0.0
+
+
+def _note_rate_limit(url: str, response):
+    if response.status_code == 429:
+        from utils.source_health import rate_limited
+
+        rate_limited(get_host(url), response.headers.get('Retry-After'))
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the per-host concurrency slots for the duration of a request"""
+    slot = _get_host_slot(get_host(url))
+    slot.acquire()
+    try:
+        yield
+    finally:
+        slot.release()
+
+
+def http_get(url: str, headers=None, timeout=10, verify=True):
+    """GET a URL through the shared session for its host, respecting the per-host cap.
+
+    Raises HostBackoff without sending anything while the host is backed off.
+    """
+    remaining = _backoff_remaining(url)
+    if remaining:
+        raise HostBackoff(f"{get_host(url)} backed off for another {remaining:.0f}s")
+    session = get_session(get_host(url))
+    with host_slot(url):
+        response = session.get(url, headers=headers, timeout=timeout, verify=verify)
+    _note_rate_limit(url, response)
+    return response
+
+
+def cached_get(url: str, headers=None, timeout=10, verify=True, ttl=0):
+    """GET a URL through the on-disk cache.
+
+    Entries younger than ttl seconds are served straight from disk; older
+    ones are revalidated with If-None-Match / If-Modified-Since so an
+    unchanged resource costs a 304 instead of a full download. While the
+    host is backed off (see utils.source_health) a stale entry is served as is.
+    """
+    from utils.http_cache import get_cache, CachedResponse
+
+    cache = get_cache()
+    entry = cache.lookup(url)
+    if entry and not entry['complete']:
+        entry = None    # a prefix left by a streaming reader is no use here
+
+    # A stale copy beats nothing while the host is backed off
+    if entry and (time.time() - entry['fetched_at'] < ttl or _backoff_remaining(url)):
+        cache.count('hits')
+        cache.touch(url)
+        return CachedResponse(url, entry['status'], entry['headers'], entry['body'],
+                              final_url=entry['final_url'], from_cache=True)
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_get(url, headers=request_headers, timeout=timeout, verify=verify)
+
+    if response.status_code == 304 and entry:
+        cache.count('revalidated')
+        cache.touch(url, revalidated=True)
+        return CachedResponse(url, entry['status'], entry['headers'], entry['body'],
+                              final_url=entry['final_url'], from_cache=True, revalidated=True)
+
+    cache.count('misses')
+    if response.status_code == 200:
+        cache.store(url, response)
+    return CachedResponse(url, response.status_code, response.headers, response.content,
+                          final_url=response.url)
+
+
+class HttpStream:
+    """A response whose body is consumed chunk by chunk, from the network or the cache"""
+
+    def __init__(self, url, status_code, headers, body=None, response=None, final_url=None, from_cache=False,
+                 revalidated=False):
+        self.url = final_url or url
+        self.status_code = status_code
+        self.headers = headers
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+        self.complete = False
+        self._body = body
+        self._response = response
+        self._received = []
+
+    @property
+    def sent_request(self):
+        """False when the cache answered without asking the server"""
+        return not self.from_cache or self.revalidated
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+    def iter_content(self, chunk_size=16 * 1024):
+        if self._body is not None:
+            for start in range(0, len(self._body), chunk_size):
+                yield self._body[start:start + chunk_size]
+        else:
+            for chunk in self._response.iter_content(chunk_size):
+                self._received.append(chunk)
+                yield chunk
+        self.complete = True
+
+    def received(self):
+        """Bytes read from the network so far"""
+        return b''.join(self._received)
+
+
+@contextmanager
+def open_stream(url: str, headers=None, timeout=10, verify=True, ttl=0, partial_ok=False):
+    """Open a URL for incremental reading, going through the on-disk cache.
+
+    Same freshness, revalidation and backoff rules as cached_get. On a network fetch
+    the per-host slot is held until the caller is done reading, and whatever
+    was read is stored. A body the caller stopped reading early is stored as
+    incomplete: only callers passing partial_ok=True (who would stop at the
+    same point) are served it or revalidate it; everyone else fetches in full.
+    """
+    from utils.http_cache import get_cache, CachedResponse
+
+    cache = get_cache()
+    entry = cache.lookup(url)
+    if entry and not entry['complete'] and not partial_ok:
+        entry = None
+
+    if entry and (time.time() - entry['fetched_at'] < ttl or _backoff_remaining(url)):
+        cache.count('hits')
+        cache.touch(url)
+        yield HttpStream(url, entry['status'], CaseInsensitiveDict(entry['headers']), body=entry['body'],
+                         final_url=entry['final_url'], from_cache=True)
+        return
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    remaining = _backoff_remaining(url)
+    if remaining:
+        raise HostBackoff(f"{get_host(url)} backed off for another {remaining:.0f}s")
+    session = get_session(get_host(url))
+    with host_slot(url):
+        response = session.get(url, headers=request_headers, timeout=timeout, verify=verify, stream=True)
+        _note_rate_limit(url, response)
+        try:
+            if response.status_code == 304 and entry:
+                cache.count('revalidated')
+                cache.touch(url, revalidated=True)
+                yield HttpStream(url, entry['status'], CaseInsensitiveDict(entry['headers']), body=entry['body'],
+                                 final_url=entry['final_url'], from_cache=True, revalidated=True)
+                return
+
+            cache.count('misses')
+            stream = HttpStream(url, response.status_code, response.headers, response=response,
+                                final_url=response.url)
+            yield stream
+            if response.status_code == 200:
+                cache.store(url, CachedResponse(url, 200, response.headers, stream.received(),
+                                                final_url=response.url), complete=stream.complete)
+        finally:
+            response.close()
+
+
+def close_sessions():
+    """Close every pooled session (used by long-running workers on shutdown)"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,226 @@
+"""
+Content-addressed cache for LLM completions: in-memory LRU in front of an on-disk store,
+with single-flight de-duplication of concurrent identical requests
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.http_cache import CACHE_DIR
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "128"))
+
+
+def make_key(*parts):
+    """Stable SHA-256 key for any JSON-serialisable parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    """One computation in progress: callers wait for its result, or tail its pieces as they arrive"""
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.parts = []
+        self._done = False
+        self._changed = threading.Condition()
+
+    def add(self, piece: str):
+        with self._changed:
+            self.parts.append(piece)
+            self._changed.notify_all()
+
+    def finish(self):
+        with self._changed:
+            self._done = True
+            self._changed.notify_all()
+
+    def wait(self):
+        with self._changed:
+            self._changed.wait_for(lambda: self._done)
+
+    def follow(self):
+        """Yield the pieces so far and then each new one until the computation ends"""
+        sent = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: len(self.parts) > sent or self._done)
+                new, done = self.parts[sent:], self._done
+            sent += len(new)
+            yield from new
+            if done:
+                break
+        if self.error is not None:
+            raise self.error
+        if not sent and self.result:
+            # Computed by get_or_compute, which has no pieces
+            yield self.result
+
+
+class LLMCache:
+    """TTL cache of text results keyed by content hash"""
+
+    def __init__(self, name: str, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._front = OrderedDict()     # key -> (created_at, value)
+        self._inflight = {}             # key -> _Flight
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                namespace TEXT,
+                key TEXT,
+                value TEXT,
+                created_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._db.commit()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def _remember(self, key, created_at, value):
+        self._front[key] = (created_at, value)
+        self._front.move_to_end(key)
+        while len(self._front) > self.max_entries:
+            self._front.popitem(last=False)
+
+    def _lookup(self, key):
+        """Fresh cached value or None; caller holds the lock"""
+        now = time.time()
+        entry = self._front.get(key)
+        if entry and now - entry[0] < self.ttl:
+            self._front.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return entry[1]
+
+        row = self._db.execute(
+            "SELECT value, created_at FROM completions WHERE namespace = ? AND key = ?",
+            (self.name, key)
+        ).fetchone()
+        if row and now - row[1] < self.ttl:
+            self._remember(key, row[1], row[0])
+            self.stats['disk_hits'] += 1
+            return row[0]
+        return None
+
+    def get(self, key: str):
+        with self._lock:
+            return self._lookup(key)
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                    (self.name, key, value, now)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                # The in-memory front still has it; only other processes miss out
+                print(f"⚠️ LLM cache write skipped: {e}")
+
+    def prune(self):
+        """Delete this namespace's entries that have outlived the TTL from disk"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM completions WHERE namespace = ? AND created_at <= ?", (self.name, cutoff)
+            )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._front.clear()
+            self._db.execute("DELETE FROM completions WHERE namespace = ?", (self.name,))
+            self._db.commit()
+
+    def get_or_compute(self, key: str, compute):
+        """Return the cached value for key, or run compute() once for all concurrent callers"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result if flight.result is not None else ''.join(flight.parts)
+
+        try:
+            value = compute()
+            if value:
+                self.set(key, value)
+            flight.result = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.finish()
+
+    def stream(self, key: str, produce):
+        """Yield the value for key piece by piece, running produce() once for all concurrent callers.
+
+        produce() returns an iterator of text pieces. It runs on its own
+        thread, so every caller (the first one included) tails the same pieces
+        as they arrive, and one that stops reading does not cut the others off.
+        The joined pieces are cached; a cached value is yielded in one piece.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            flight = None
+            if value is None:
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    self.stats['misses'] += 1
+                    threading.Thread(target=self._produce, args=(key, flight, produce), daemon=True).start()
+                else:
+                    self.stats['coalesced'] += 1
+
+        if flight is None:
+            yield value
+        else:
+            yield from flight.follow()
+
+    def _produce(self, key, flight, produce):
+        try:
+            for piece in produce():
+                flight.add(piece)
+            value = ''.join(flight.parts)
+            if value:
+                self.set(key, value)
+            flight.result = value
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.finish()
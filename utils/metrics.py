@@ -0,0 +1,209 @@
+"""
+In-process pipeline metrics: timing spans aggregated into per-stage, per-source
+latency histograms and success rates, exportable as Prometheus text or JSON
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Distinct (stage, source) series kept before new sources are folded into "other"
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "500"))
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = "newsletter"
+
+
+class Series:
+    """Latency histogram and outcome counts for one (stage, source)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.failures = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_error = None
+
+    def observe(self, seconds: float, ok: bool, error=None):
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if not ok:
+            self.failures += 1
+            if error:
+                self.last_error = str(error)[:200]
+
+    def quantile(self, fraction: float):
+        """Upper bound of the bucket holding the given quantile"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (self.max,), self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Thread-safe registry of spans and counters"""
+
+    def __init__(self, max_series=METRICS_MAX_SERIES):
+        self.max_series = max_series
+        self._series = {}       # (stage, source) -> Series
+        self._counters = {}     # (name, sorted label items) -> value
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, stage: str, source: str, seconds: float, ok=True, error=None):
+        with self._lock:
+            key = (stage, source)
+            if key not in self._series and len(self._series) >= self.max_series:
+                key = (stage, 'other')
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series()
+            series.observe(seconds, ok, error)
+
+    def add(self, name: str, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage: str, source=''):
+        """Time a block. Set outcome['ok'] = False to count a handled failure."""
+        outcome = {'ok': True, 'error': None}
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except Exception as e:
+            outcome['ok'], outcome['error'] = False, e
+            raise
+        finally:
+            self.observe(stage, source or 'unknown', time.perf_counter() - start, outcome['ok'], outcome['error'])
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Plain-dict view: one row per (stage, source), slowest p95 first, plus counters"""
+        with self._lock:
+            rows = [{
+                'stage': stage,
+                'source': source,
+                'count': s.count,
+                'failures': s.failures,
+                'success_rate': round((s.count - s.failures) / s.count, 3) if s.count else None,
+                'avg_ms': round(s.total / s.count * 1000, 1) if s.count else 0.0,
+                'p50_ms': round(s.quantile(0.5) * 1000, 1),
+                'p95_ms': round(s.quantile(0.95) * 1000, 1),
+                'max_ms': round(s.max * 1000, 1),
+                'last_error': s.last_error,
+            } for (stage, source), s in self._series.items()]
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        rows.sort(key=lambda row: (row['stage'], -row['p95_ms']))
+        return {'since': self.started_at, 'spans': rows, 'counters': counters}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            series = sorted((key, s.buckets[:], s.count, s.failures, s.total) for key, s in self._series.items())
+            counters = sorted(self._counters.items())
+
+        name = f"{PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latency of pipeline stages by source",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, source), buckets, count, _, total in series:
+            labels = _labels(stage=stage, source=source)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        failures = f"{PREFIX}_stage_failures_total"
+        lines += [f"# HELP {failures} Pipeline stage calls that failed", f"# TYPE {failures} counter"]
+        for (stage, source), _, _, failed, _ in series:
+            lines.append(f"{failures}{{{_labels(stage=stage, source=source)}}} {failed}")
+
+        declared = set()
+        for (counter, labels), value in counters:
+            metric = f"{PREFIX}_{counter}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            label_text = _labels(**dict(labels))
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+@contextmanager
+def span(stage: str, source=''):
+    """Time a pipeline step under the process-wide registry (no-op if METRICS_ENABLED=0)"""
+    if not METRICS_ENABLED:
+        yield {'ok': True, 'error': None}
+        return
+    with _metrics.span(stage, source) as outcome:
+        yield outcome
+
+
+def observe(stage: str, source: str, seconds: float, ok=True, error=None):
+    """Record a timing measured by the caller (e.g. across a generator's lifetime)"""
+    if METRICS_ENABLED:
+        _metrics.observe(stage, source, seconds, ok, error)
+
+
+def count(name: str, value=1, **labels):
+    if METRICS_ENABLED and value:
+        _metrics.add(name, value, **labels)
+
+
+def write_metrics(path: str):
+    """Write the Prometheus text (or JSON, for a .json path) atomically, e.g. for a textfile collector"""
+    text = _metrics.to_json(indent=2) if path.endswith('.json') else _metrics.to_prometheus()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,196 @@
+"""
+Newsletter rendering: parse the curated text once, render its HTML once,
+and splice only the per-recipient fields into a precompiled template
+"""
+
+import html
+import os
+import re
+from urllib.parse import quote
+
+DEFAULT_SUBJECT = 'Your AI Newsletter'
+
+SECTION_TITLES = {
+    'summary': 'Summary',
+    'learning': 'Key Learning',
+    'action': "Today's Action",
+}
+
+# Where readers unsubscribe ({email} is replaced); without one, no link or header is sent
+UNSUBSCRIBE_URL = os.getenv("UNSUBSCRIBE_URL", "")
+
+UNSUBSCRIBE_FOOTER = """<p style="color: #6b7280; font-size: 12px;">
+                <a href="{url}" style="color: #6b7280;">Unsubscribe</a>
+            </p>"""
+
+EMAIL_TEMPLATE = """
+    <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <h1 style="color: #2563eb;">📰 Your Personalized AI Newsletter</h1>
+            <p>{{greeting}}</p>
+            <div style="background: #f3f4f6; padding: 20px; border-radius: 8px;">
+                {{body}}
+            </div>
+            {{footer}}
+        </body>
+    </html>
+    """
+
+_SECTION_RE = re.compile(r'^\W*(SUBJECT|SUMMARY|LEARNING|ACTION)\W*:\**\s*', re.M)
+_FIELD_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+class Newsletter:
+    """The SUBJECT / SUMMARY / LEARNING / ACTION sections of a curated newsletter"""
+
+    def __init__(self, subject='', summary='', learning='', action='', raw=''):
+        self.subject = subject or DEFAULT_SUBJECT
+        self.summary = summary
+        self.learning = learning
+        self.action = action
+        self.raw = raw
+
+
+def parse_newsletter(content: str):
+    """Split curated text into its sections (unmarked text counts as summary)"""
+    sections = {}
+    matches = list(_SECTION_RE.finditer(content))
+
+    preamble = content[:matches[0].start()] if matches else content
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(content)
+        name = match.group(1).lower()
+        sections.setdefault(name, content[match.end():end].strip())
+
+    subject = sections.get('subject', '').splitlines()[0].strip() if sections.get('subject') else ''
+    summary = sections.get('summary') or preamble.strip()
+    return Newsletter(subject.strip('*# '), summary, sections.get('learning', ''),
+                      sections.get('action', ''), content)
+
+
+def _inline_markdown(text: str):
+    text = html.escape(text, quote=False)
+    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+    text = re.sub(r'\*\*(.+?)\*\*|__(.+?)__', lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])', r'<em>\1</em>', text)
+    text = re.sub(
+        r'\[([^\]]+)\]\((https?://[^)\s]+)\)',
+        # The URL is already HTML-escaped with the rest of the text
+        lambda m: f'<a href="{m.group(2).replace(chr(34), "%22")}">{m.group(1)}</a>',
+        text
+    )
+    return text
+
+
+def markdown_to_html(text: str):
+    """Convert the Markdown subset LLMs produce (paragraphs, lists, headings, emphasis, links)"""
+    blocks = []
+    list_tag = None
+    list_items = []
+    paragraph = []
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(f"<p>{'<br>'.join(_inline_markdown(line) for line in paragraph)}</p>")
+            paragraph.clear()
+
+    def flush_list():
+        nonlocal list_tag
+        if list_items:
+            items = ''.join(f"<li>{_inline_markdown(item)}</li>" for item in list_items)
+            blocks.append(f"<{list_tag}>{items}</{list_tag}>")
+            list_items.clear()
+        list_tag = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        bullet = re.match(r'^[-*•]\s+(.*)', stripped)
+        numbered = re.match(r'^\d+[.)]\s+(.*)', stripped)
+        heading = re.match(r'^(#{1,6})\s+(.*)', stripped)
+
+        if not stripped:
+            flush_paragraph()
+            flush_list()
+        elif heading:
+            flush_paragraph()
+            flush_list()
+            level = min(len(heading.group(1)) + 2, 6)
+            blocks.append(f"<h{level}>{_inline_markdown(heading.group(2))}</h{level}>")
+        elif bullet or numbered:
+            flush_paragraph()
+            tag = 'ul' if bullet else 'ol'
+            if list_tag and list_tag != tag:
+                flush_list()
+            list_tag = tag
+            list_items.append((bullet or numbered).group(1))
+        else:
+            flush_list()
+            paragraph.append(stripped)
+
+    flush_paragraph()
+    flush_list()
+    return '\n'.join(blocks)
+
+
+def _compile(template: str):
+    """Split a template into literal text and {{field}} slots once"""
+    segments = []
+    position = 0
+    for match in _FIELD_RE.finditer(template):
+        segments.append(template[position:match.start()])
+        segments.append((match.group(1),))
+        position = match.end()
+    segments.append(template[position:])
+    return segments
+
+
+_COMPILED_TEMPLATE = _compile(EMAIL_TEMPLATE)
+
+
+class RenderedNewsletter:
+    """A newsletter rendered once; html_for() only fills in the recipient's fields"""
+
+    def __init__(self, newsletter: Newsletter, body_html: str):
+        self.newsletter = newsletter
+        self.subject = newsletter.subject
+        # Fill the shared body now; only per-recipient slots remain
+        self._segments = []
+        for segment in _COMPILED_TEMPLATE:
+            if segment == ('body',):
+                self._segments.append(body_html)
+            else:
+                self._segments.append(segment)
+
+    def html_for(self, to_email: str, greeting=None):
+        unsubscribe_url = unsubscribe_url_for(to_email)
+        fields = {
+            'greeting': html.escape(greeting or greeting_for(to_email)),
+            'footer': UNSUBSCRIBE_FOOTER.format(url=html.escape(unsubscribe_url)) if unsubscribe_url else '',
+        }
+        return ''.join(
+            fields.get(segment[0], '') if isinstance(segment, tuple) else segment
+            for segment in self._segments
+        )
+
+
+def greeting_for(to_email: str):
+    name = re.split(r'[._+\-\d]', to_email.split('@')[0])[0]
+    return f"Hi {name.capitalize()}," if len(name) > 1 else "Hi there,"
+
+
+def unsubscribe_url_for(to_email: str):
+    """The recipient's unsubscribe link, or '' when UNSUBSCRIBE_URL is not configured"""
+    return UNSUBSCRIBE_URL.replace('{email}', quote(to_email)) if UNSUBSCRIBE_URL else ''
+
+
+def render_newsletter(content: str):
+    """Parse and render curated newsletter text once for any number of recipients"""
+    newsletter = parse_newsletter(content)
+    parts = []
+    if newsletter.summary:
+        parts.append(f"<h2>{SECTION_TITLES['summary']}</h2>\n{markdown_to_html(newsletter.summary)}")
+    if newsletter.learning:
+        parts.append(f"<h2>{SECTION_TITLES['learning']}</h2>\n{markdown_to_html(newsletter.learning)}")
+    if newsletter.action:
+        parts.append(f"<h2>{SECTION_TITLES['action']}</h2>\n{markdown_to_html(newsletter.action)}")
+    return RenderedNewsletter(newsletter, '\n'.join(parts))
@@ -0,0 +1,106 @@
+"""
+Process pool for the CPU-bound half of article fetching.
+
+Fetch threads download page bytes, release the connection and hand them
+here; extraction runs in worker processes, so a large ingestion run parses
+on every core instead of sharing one interpreter's GIL with the network
+threads, and the fetch threads move on to the next page. Off by default:
+ingest.py turns it on, while the app keeps extracting inline as pages stream.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+
+from utils.extractor import MAX_HTML_BYTES
+
+# Worker processes for ingestion runs (0 keeps parsing in-thread, which is also
+# the default on a single core, where a separate process only adds overhead)
+_CPUS = os.cpu_count() or 1
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(_CPUS if _CPUS > 1 else 0)))
+
+# Pages submitted but not yet parsed before fetch threads wait (0: twice the workers)
+PARSE_QUEUE_DEPTH = int(os.getenv("PARSE_QUEUE_DEPTH", "0"))
+
+_pool = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _parse(data: bytes, encoding: str):
+    """Runs in a worker: decode and extract, returning only the text"""
+    from utils.extractor import extract_content
+
+    return extract_content(data.decode(encoding, errors='replace'))
+
+
+def start_parse_pool(workers=PARSE_WORKERS, queue_depth=PARSE_QUEUE_DEPTH):
+    """Send extraction to `workers` processes from now on; returns False (and parses in-thread) for 0"""
+    global _pool, _slots
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _lock:
+        if _pool is not None or workers <= 0:
+            return _pool is not None
+        # spawn: the parent is full of fetch threads, which fork does not copy safely
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _slots = threading.BoundedSemaphore(queue_depth or 2 * workers)
+        print(f"🧮 Parsing article pages on {workers} processes")
+        return True
+
+
+def stop_parse_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = _slots = None
+
+
+atexit.register(stop_parse_pool)
+
+
+def parse_pool_enabled():
+    return _pool is not None
+
+
+def read_limited(chunks, max_bytes=MAX_HTML_BYTES):
+    """Join a page's byte chunks, stopping the download at max_bytes"""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if size + len(chunk) > max_bytes:
+            parts.append(chunk[:max_bytes - size])
+            break
+        parts.append(chunk)
+        size += len(chunk)
+    return parts[0] if len(parts) == 1 else b''.join(parts)
+
+
+def submit_parse(data: bytes, encoding='utf-8'):
+    """Queue a page's bytes for extraction on the process pool and return the Future of its text.
+
+    The bytes go to the worker as a single pickled buffer and only the
+    extracted text comes back. Blocks while PARSE_QUEUE_DEPTH pages are
+    already waiting, so downloads cannot outrun the parsers.
+    """
+    pool, slots = _pool, _slots
+    if pool is None:
+        raise RuntimeError("parse pool is not running")
+
+    slots.acquire()
+    try:
+        future = pool.submit(_parse, data, encoding)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def parse_html(data: bytes, encoding='utf-8'):
+    """Extract article text from page bytes, on the process pool when it is running"""
+    if _pool is None:
+        return _parse(data, encoding)
+    return submit_parse(data, encoding).result()
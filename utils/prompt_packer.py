@@ -0,0 +1,158 @@
+"""
+Token-budgeted, relevance-ranked packing of articles into the curation prompt
+"""
+
+import math
+import os
+import re
+from itertools import zip_longest
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Article text allowed in one curation prompt, and per article
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+MAX_ARTICLE_TOKENS = int(os.getenv("PROMPT_MAX_ARTICLE_TOKENS", "600"))
+MIN_ARTICLE_TOKENS = 40
+
+# Rough characters-per-token for English text with the Groq-hosted models
+CHARS_PER_TOKEN = 4
+
+# How much each signal counts towards an article's rank
+RELEVANCE_WEIGHT = 0.5
+ENGAGEMENT_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.2
+RECENCY_HALF_LIFE_HOURS = 24
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]?\s')
+
+
+def estimate_tokens(text: str):
+    """Cheap token estimate (no tokenizer dependency)"""
+    return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+
+def truncate_at_sentence(text: str, max_tokens: int):
+    """Cut text to roughly max_tokens, preferring the last full sentence that fits"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(cut)]
+    if ends and ends[-1] >= max_chars // 2:
+        return cut[:ends[-1]].rstrip()
+
+    space = cut.rfind(' ')
+    return (cut[:space] if space > 0 else cut).rstrip() + '…'
+
+
+def topic_keywords(user_topics: list):
+    """Lower-cased keywords for the chosen topics, including their display names"""
+    from config.sources import NEWS_SOURCES
+
+    keywords = set()
+    for topic in user_topics:
+        keywords.update(_WORD_RE.findall(topic.lower()))
+        keywords.update(_WORD_RE.findall(NEWS_SOURCES.get(topic, {}).get('name', '').lower()))
+    return keywords
+
+
+def parse_published(published):
+    """Best-effort parse of ISO-8601 (HN) and RFC 822 (RSS) timestamps to an aware datetime"""
+    if not published:
+        return None
+    if isinstance(published, (int, float)):
+        return datetime.fromtimestamp(published, timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(published.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        try:
+            parsed = parsedate_to_datetime(published)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _relevance(article: dict, keywords: set):
+    if not keywords:
+        return 0.0
+    title_words = set(_WORD_RE.findall(article.get('title', '').lower()))
+    content_words = set(_WORD_RE.findall(article.get('content', '').lower()))
+    hits = 2 * len(keywords & title_words) + len(keywords & content_words)
+    return min(1.0, hits / (2 * len(keywords)))
+
+
+def _engagement(article: dict):
+    return article.get('points') or article.get('score') or 0
+
+
+def _recency(article: dict, now: datetime):
+    published = parse_published(article.get('published'))
+    if published is None:
+        return 0.5
+    age_hours = max(0.0, (now - published).total_seconds() / 3600)
+    return 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+
+
+def rank_articles(articles: list, user_topics: list):
+    """Order articles by keyword relevance, engagement and recency (best first).
+
+    Articles tagged with more than one 'category' are ranked within their
+    category and interleaved, so no chosen category crowds out the others.
+    """
+    categories = list(dict.fromkeys(a.get('category') for a in articles))
+    if len(categories) > 1:
+        ranked = [
+            _rank_within([a for a in articles if a.get('category') == category], [category] if category else user_topics)
+            for category in categories
+        ]
+        return [a for group in zip_longest(*ranked) for a in group if a is not None]
+    return _rank_within(articles, user_topics)
+
+
+def _rank_within(articles: list, user_topics: list):
+    keywords = topic_keywords(user_topics)
+    now = datetime.now(timezone.utc)
+    top_engagement = max((_engagement(a) for a in articles), default=0)
+
+    def score(article):
+        engagement = math.log1p(_engagement(article)) / math.log1p(top_engagement) if top_engagement else 0.0
+        return (RELEVANCE_WEIGHT * _relevance(article, keywords)
+                + ENGAGEMENT_WEIGHT * engagement
+                + RECENCY_WEIGHT * _recency(article, now))
+
+    return sorted(articles, key=score, reverse=True)
+
+
+def pack_articles(articles: list, user_topics: list, budget=PROMPT_TOKEN_BUDGET):
+    """Fill the token budget with the best-ranked articles, truncated at sentence boundaries.
+
+    Returns a list of (article, text) pairs in rank order.
+    """
+    packed = []
+    remaining = budget
+
+    for article in rank_articles(articles, user_topics):
+        header_tokens = estimate_tokens(f"Source: {article.get('source', '')}\n\n\n")
+        allowance = min(MAX_ARTICLE_TOKENS, remaining - header_tokens)
+        if allowance < MIN_ARTICLE_TOKENS:
+            break
+
+        text = truncate_at_sentence(article.get('content', ''), allowance)
+        if not text:
+            continue
+        packed.append((article, text))
+        remaining -= header_tokens + estimate_tokens(text)
+
+    return packed
+
+
+def build_context(packed: list):
+    """Render packed articles in the curation prompt's article format"""
+    return "\n\n".join([
+        f"Source: {article['source']}\n{text}"
+        for article, text in packed
+    ])
@@ -2,38 +2,347 @@
 Main news scraper that gets real recent content from various sources
 """
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 import json
 from datetime import datetime
+import requests
 import urllib3
 
+from config.sources import CACHE_TTLS
+from utils.http_client import cached_get, open_stream, get_host, DEFAULT_HEADERS, HostBackoff
+from utils.feeds import iter_feed_items
+from utils.extractor import extract_from_chunks, is_html_content_type, charset_from_content_type, MAX_HTML_BYTES
+from utils.article_pool import load_pool, save_pool
+from utils.dedup import ArticleDeduper, canonicalize_url
+from utils.metrics import span, observe, count
+from utils import source_health
+from utils.parse_pool import parse_pool_enabled, parse_html, read_limited, submit_parse
+
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def scrape_sources(category: str, max_articles=5):
-    """Main news scraper that gets real recent content"""
-    print(f"🔍 Scraping recent {category} news (working method)...")
+# Fetch engine settings
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+SCRAPE_DEADLINE = float(os.getenv("SCRAPER_DEADLINE", "20"))
+
+# Feed entries with at least this much text skip the article page fetch
+RSS_MIN_CONTENT = int(os.getenv("RSS_MIN_CONTENT", "200"))
+
+# Result of a queued article fetch that was no longer needed
+SKIPPED = object()
+
+# Worker cap for a fetch plan shared by several categories
+MAX_PLAN_WORKERS = int(os.getenv("SCRAPER_MAX_PLAN_WORKERS", "32"))
+
+# How many articles the ingester keeps per category
+POOL_SIZE = int(os.getenv("ARTICLE_POOL_SIZE", "20"))
+
+def scrape_sources(category: str, max_articles=5, max_age=None, exclude=None):
+    """Main news scraper that gets real recent content.
+
+    Reads from the category pool kept fresh by ingest.py; only when the pool
+    is missing, too small or older than max_age seconds does it scrape live
+    (and refill the pool for the next caller). Article URLs in exclude
+    (e.g. a reader's sent filter) are skipped before their body is fetched.
+    """
+    return list(iter_scrape_sources(category, max_articles, max_age, exclude))
+
+def iter_scrape_sources(category: str, max_articles=5, max_age=None, exclude=None):
+    """Like scrape_sources, but yields each article as soon as it is ready"""
+    pooled = _without(load_pool(category, max_age), exclude)
+    if pooled and len(pooled) >= max_articles:
+        print(f"⚡ Serving {category} articles from the ingested pool")
+        yield from pooled[:max_articles]
+        return
     
     articles = []
+    for article in iter_scrape_sources_live(category, max_articles, exclude=exclude):
+        articles.append(article)
+        yield article
+    
+    # A scrape that skipped some articles is one reader's view, not the category's
+    if not exclude and articles and len(articles) > len(pooled or []):
+        save_pool(category, articles)
+
+def _without(articles, exclude):
+    if not articles or not exclude:
+        return articles
+    return [article for article in articles if article['source'] not in exclude]
+
+def scrape_categories(categories: list, max_articles=5, max_age=None, exclude=None):
+    """scrape_sources for several categories at once; returns {category: [articles]}.
+
+    Categories with a fresh pool are served from it; the rest share one
+    fetch plan, so overlapping listings and article pages are fetched once.
+    """
+    results = {category: [] for category in categories}
+    for category, article in iter_scrape_categories(categories, max_articles, max_age, exclude):
+        results[category].append(article)
+    return results
+
+def iter_scrape_categories(categories: list, max_articles=5, max_age=None, exclude=None):
+    """Like scrape_categories, but yields (category, article) pairs as soon as they are ready"""
+    live = []
+    for category in categories:
+        pooled = _without(load_pool(category, max_age), exclude)
+        if pooled and len(pooled) >= max_articles:
+            print(f"⚡ Serving {category} articles from the ingested pool")
+            for article in pooled[:max_articles]:
+                yield category, article
+        else:
+            live.append((category, pooled))
+    
+    if not live:
+        return
+    
+    results = {category: [] for category, _ in live}
+    for category, article in iter_scrape_categories_live(list(results), max_articles, exclude=exclude):
+        results[category].append(article)
+        yield category, article
+    
+    for category, pooled in live:
+        if not exclude and results[category] and len(results[category]) > len(pooled or []):
+            save_pool(category, results[category])
+
+def scrape_categories_live(categories: list, max_articles=5, deadline=SCRAPE_DEADLINE):
+    """Scrape several categories right now in one shared fetch plan; returns {category: [articles]}"""
+    results = {category: [] for category in categories}
+    for category, article in iter_scrape_categories_live(categories, max_articles, deadline):
+        results[category].append(article)
+    return results
+
+def iter_scrape_categories_live(categories: list, max_articles=5, deadline=SCRAPE_DEADLINE, exclude=None):
+    if len(categories) == 1:
+        for article in iter_scrape_sources_live(categories[0], max_articles, deadline, exclude):
+            yield categories[0], article
+        return
+    
+    print(f"🔍 Scraping recent {', '.join(categories)} news in one fetch plan...")
+    plan = get_category_plan(categories)
+    workers = min(MAX_WORKERS * len(categories), MAX_PLAN_WORKERS)
+    
+    found = {category: 0 for category in categories}
+    started = time.perf_counter()
+    for category, article in iter_category_plan(plan, max_articles, deadline, workers, exclude):
+        found[category] += 1
+        yield category, article
+    
+    elapsed = time.perf_counter() - started
+    for category in categories:
+        observe('scrape_category', category, elapsed, ok=found[category] > 0)
+    print(f"✅ Found {found} real articles from {len(plan)} sources")
+
+def merge_category_articles(results: dict):
+    """Flatten {category: [articles]} for curation, tagging each article with its category.
+
+    An article found for several categories is kept once, under the first.
+    """
+    merged = []
+    seen = set()
+    for category, articles in results.items():
+        for article in articles:
+            if article['source'] not in seen:
+                seen.add(article['source'])
+                merged.append(dict(article, category=category))
+    return merged
+
+def scrape_sources_live(category: str, max_articles=5, deadline=SCRAPE_DEADLINE):
+    """Scrape the sources of a category right now, bypassing the pool"""
+    return list(iter_scrape_sources_live(category, max_articles, deadline))
+
+def iter_scrape_sources_live(category: str, max_articles=5, deadline=SCRAPE_DEADLINE, exclude=None):
+    print(f"🔍 Scraping recent {category} news (working method)...")
     
     # Use working news sources that are known to work
     working_sources = get_working_sources(category)
     
-    for source in working_sources:
-        try:
-            print(f"📰 Checking: {source['name']}")
-            articles_from_source = scrape_working_source(source)
-            articles.extend(articles_from_source)
-            
-            if len(articles) >= max_articles:
+    found = 0
+    started = time.perf_counter()
+    for article in iter_fetch_plan(working_sources, max_articles, deadline, exclude=exclude):
+        found += 1
+        yield article
+    
+    observe('scrape_category', category, time.perf_counter() - started, ok=found > 0)
+    print(f"✅ Found {found} real articles")
+
+def run_fetch_plan(sources, max_articles=5, deadline=SCRAPE_DEADLINE, max_workers=MAX_WORKERS):
+    """Fetch source listings and article bodies concurrently (see iter_fetch_plan)"""
+    return list(iter_fetch_plan(sources, max_articles, deadline, max_workers))
+
+def iter_fetch_plan(sources, max_articles=5, deadline=SCRAPE_DEADLINE, max_workers=MAX_WORKERS, exclude=None):
+    """Fetch source listings and article bodies concurrently, yielding articles as they complete.
+
+    Every source listing is requested at once; as each listing comes back its
+    article pages are queued on the same worker pool. Candidates whose
+    canonical URL was already seen in this run are dropped before their
+    body is fetched, bodies extracted by an earlier run are reused, and
+    near-duplicate texts are dropped, as are candidates whose URL is in
+    exclude. Stops as soon as max_articles articles are in hand or the
+    deadline (seconds) passes.
+    """
+    for _, article in iter_category_plan(sources, max_articles, deadline, max_workers, exclude):
+        yield article
+
+def iter_category_plan(sources, max_articles=5, deadline=SCRAPE_DEADLINE, max_workers=MAX_WORKERS, exclude=None):
+    """Run one fetch plan for sources serving several categories, yielding (category, article).
+
+    Each source names the categories it serves under 'categories' (sources
+    without it serve a single unnamed category, None). Fetching continues
+    until every category has max_articles articles or the deadline passes.
+    A page linked from the sources of two categories is fetched once and
+    handed to both. With the parse pool running, worker threads only
+    download pages; their parses are collected here as they finish.
+    """
+    counts = {}
+    for source in sources:
+        for category in source.get('categories') or [None]:
+            counts[category] = 0
+    
+    deduper = ArticleDeduper()
+    already_sent = 0
+    collected = {}   # canonical URL -> (article, categories it was handed to)
+    in_flight = {}   # canonical URL -> candidate whose body is being fetched
+    expires = time.monotonic() + deadline
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper')
+    pending = {}
+    parsing = set()  # pending futures that are page parses on the process pool
+    
+    def wanting(categories):
+        return [c for c in categories if counts[c] < max_articles]
+    
+    def is_done():
+        return all(n >= max_articles for n in counts.values())
+    
+    def hand_out(article, categories):
+        for category in categories:
+            counts[category] += 1
+        return [(category, article) for category in categories]
+    
+    def collect(article, categories, canonical_url='', fetched=False):
+        targets = wanting(categories)
+        # Only bodies fetched from the page are worth remembering for later runs
+        if not article or not targets or not deduper.accept(article, canonical_url if fetched else ''):
+            return []
+        if canonical_url:
+            collected[canonical_url] = (article, set(targets))
+        print(f"   ✅ Found: {article['title'][:50]}...")
+        return hand_out(article, targets)
+    
+    def fetch_body(candidate):
+        # Its categories may have filled up while it waited in the queue
+        if not wanting(candidate['categories']):
+            return SKIPPED
+        if parse_pool_enabled():
+            # Download only: the page text (or the Future of it) comes back to this loop
+            return get_article_content_safe(candidate['source'], defer_parse=True)
+        return finish_candidate(candidate)
+    
+    def share(canonical_url, categories):
+        """A page another source already claimed: pass it to these categories too"""
+        if canonical_url in collected:
+            article, holders = collected[canonical_url]
+            targets = [c for c in wanting(categories) if c not in holders]
+            holders.update(targets)
+            return hand_out(article, targets)
+        if canonical_url in in_flight:
+            extra = [c for c in categories if c not in in_flight[canonical_url]['categories']]
+            in_flight[canonical_url]['categories'].extend(extra)
+        return []
+    
+    for source in sources:
+        pending[pool.submit(list_source_candidates, source)] = source
+    
+    try:
+        while pending and not is_done():
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                print(f"   ⏱️ Deadline reached with {sum(counts.values())} articles")
                 break
+            
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if is_done():
+                    break
+                item = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if future in parsing:
+                        # A page the worker could not parse: fall back to the listing text
+                        print(f"     ⚠️ Error parsing {item['source']}: {e}")
+                        result = ""
+                    else:
+                        print(f"   ⚠️ Failed to fetch {item.get('name', item.get('source'))}: {e}")
+                        in_flight.pop(item.get('canonical_url'), None)
+                        continue
+                parsing.discard(future)
+                
+                if isinstance(result, Future):
+                    # Downloaded; wait for the parse alongside the other fetches
+                    parsing.add(result)
+                    pending[result] = item
+                    continue
+                
+                ready = []
+                if 'type' in item:
+                    # A source listing finished: queue the article bodies it needs
+                    categories = item.get('categories') or [None]
+                    for candidate in result:
+                        if not wanting(categories):
+                            break
+                        if exclude and candidate['source'] in exclude:
+                            already_sent += 1
+                            continue
+                        canonical_url = canonicalize_url(candidate['source'])
+                        if not deduper.claim_canonical(canonical_url):
+                            ready += share(canonical_url, categories)
+                            continue
+                        
+                        candidate = dict(candidate, categories=list(categories))
+                        if candidate.get('content') is None:
+                            known = deduper.known_content(canonical_url)
+                            if known:
+                                candidate['content'] = known
+                        
+                        if candidate.get('content') is not None:
+                            ready += collect(finish_candidate(candidate), candidate['categories'], canonical_url)
+                        else:
+                            candidate['canonical_url'] = canonical_url
+                            if canonical_url:
+                                in_flight[canonical_url] = candidate
+                            pending[pool.submit(fetch_body, candidate)] = candidate
+                else:
+                    in_flight.pop(item.get('canonical_url'), None)
+                    if isinstance(result, str):
+                        result = finish_candidate(item, result) if wanting(item['categories']) else SKIPPED
+                    if result is not SKIPPED:
+                        fetched = result is not None and result['content'] != (item.get('fallback') or '')[:1500]
+                        ready += collect(result, item['categories'], item.get('canonical_url', ''), fetched)
                 
-        except Exception as e:
-            print(f"   ⚠️ Failed to scrape {source['name']}: {e}")
+                # Hand over whatever is ready before waiting on the next fetch
+                yield from ready
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
     
-    print(f"✅ Found {len(articles)} real articles")
-    return articles[:max_articles]
+    if deduper.skipped:
+        print(f"   🧹 Skipped {deduper.skipped} duplicate articles")
+    if already_sent:
+        print(f"   📭 Skipped {already_sent} articles the reader was already sent")
+        count('already_sent_skipped', already_sent)
+
+def get_category_plan(categories):
+    """Sources of several categories merged by URL; each lists the categories it serves"""
+    merged = {}
+    for category in categories:
+        for source in get_working_sources(category):
+            entry = merged.get(source['url'])
+            if entry is None:
+                merged[source['url']] = dict(source, categories=[category])
+            elif category not in entry['categories']:
+                entry['categories'].append(category)
+    return list(merged.values())
 
 def get_working_sources(category):
     """Get working news sources for each category from config"""
@@ -49,50 +358,137 @@ def get_working_sources(category):
             sources.append({
                 'name': f'Hacker News {category}',
                 'url': url,
-                'type': 'api'
+                'type': 'api',
+                'ttl': CACHE_TTLS['api']
             })
         elif 'reddit.com' in url:
             sources.append({
                 'name': f'Reddit {category}',
                 'url': url,
-                'type': 'reddit'
+                'type': 'reddit',
+                'ttl': CACHE_TTLS['reddit']
             })
         elif 'arxiv.org' in url:
             sources.append({
                 'name': f'ArXiv {category}',
                 'url': url,
-                'type': 'arxiv'
+                'type': 'arxiv',
+                'ttl': CACHE_TTLS['arxiv']
             })
     
-    return sources
+    # RSS / Atom feeds already carry titles, summaries and dates
+    for url in category_data.get('rss_sources', []):
+        sources.append({
+            'name': f'RSS {get_host(url)}',
+            'url': url,
+            'type': 'rss',
+            'ttl': CACHE_TTLS['rss']
+        })
+    
+    # Healthy, fast, productive sources first; ones in a cool-down are left out
+    return source_health.rank_sources(sources)
 
 def scrape_working_source(source):
     """Scrape from a working source"""
     articles = []
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        if source['type'] == 'api':
-            articles = scrape_api_source(source, headers)
-        elif source['type'] == 'reddit':
-            articles = scrape_reddit_source(source, headers)
-        elif source['type'] == 'arxiv':
-            articles = scrape_arxiv_source(source, headers)
+        for candidate in list_source_candidates(source):
+            article = finish_candidate(candidate)
+            if article:
+                articles.append(article)
+                print(f"   ✅ Found: {article['title'][:50]}...")
             
     except Exception as e:
         print(f"   ❌ Error scraping {source['name']}: {e}")
     
     return articles
 
+def list_source_candidates(source):
+    """Fetch a source listing and return its candidate articles (bodies not fetched yet)"""
+    print(f"📰 Checking: {source['name']}")
+    headers = dict(DEFAULT_HEADERS)
+    listers = {
+        'api': list_api_source,
+        'reddit': list_reddit_source,
+        'arxiv': list_arxiv_source,
+        'rss': list_rss_source
+    }
+    lister = listers.get(source['type'])
+    if lister is None:
+        return []
+    
+    # Only transport / HTTP errors count against the source: a listing with nothing new is fine
+    served = {}
+    started = time.perf_counter()
+    with span('scrape', source['name']) as outcome:
+        try:
+            candidates = lister(source, headers, served)
+        except HostBackoff as e:
+            print(f"   ⏭️ Skipping {source['name']}: {e}")
+            count('fetches_skipped', host=get_host(source['url']))
+            return []
+        except requests.RequestException as e:
+            print(f"   ⚠️ Listing error for {source['name']}: {e}")
+            outcome['ok'] = False
+            source_health.record(source['url'], False, time.perf_counter() - started)
+            return []
+    # A listing answered from the cache says nothing about the source right now
+    if served.get('sent_request'):
+        source_health.record(source['url'], True, time.perf_counter() - started, len(candidates))
+    count('candidates', len(candidates), source=source['name'])
+    return candidates
+
+def finish_candidate(candidate, page_text=None):
+    """Turn a candidate into an article dict, fetching the page body if needed (or using page_text)"""
+    content = candidate.get('content')
+    
+    if content is None:
+        # Fetch content from the external article URL, unless it was already parsed
+        content = page_text if page_text is not None else get_article_content_safe(candidate['source'])
+        fallback = candidate.get('fallback')
+        if fallback and len(content) < 100:
+            content = fallback
+    
+    if not content:
+        return None
+    
+    article = {
+        'source': candidate['source'],
+        'title': candidate['title'],
+        'content': content[:1500],
+        'published': candidate.get('published')
+    }
+    # Engagement signals used to rank articles for the curation prompt
+    for key in ('points', 'score'):
+        if candidate.get(key) is not None:
+            article[key] = candidate[key]
+    return article
+
 def scrape_api_source(source, headers):
     """Scrape from API source (like Hacker News)"""
-    articles = []
+    return [a for a in map(finish_candidate, list_api_source(source, headers)) if a]
+
+def scrape_reddit_source(source, headers):
+    """Scrape from Reddit source"""
+    return [a for a in map(finish_candidate, list_reddit_source(source, headers)) if a]
+
+def scrape_arxiv_source(source, headers):
+    """Scrape from ArXiv source"""
+    return [a for a in map(finish_candidate, list_arxiv_source(source, headers)) if a]
+
+def _note_served(served, response):
+    """Tell the caller (see list_source_candidates) whether the listing needed a request"""
+    if served is not None:
+        served['sent_request'] = response.sent_request
+
+def list_api_source(source, headers, served=None):
+    """List candidate articles from an API source (like Hacker News)"""
+    candidates = []
     
     try:
-        response = requests.get(source['url'], headers=headers, timeout=10)
+        response = cached_get(source['url'], headers=headers, timeout=10, ttl=source.get('ttl', 0))
+        _note_served(served, response)
         response.raise_for_status()
         
         data = response.json()
@@ -105,29 +501,29 @@ def scrape_api_source(source, headers):
                 created_at = hit.get('created_at', '')
                 
                 if title and url and points > 5:  # Only articles with some engagement
-                    # Get content from the article
-                    content = get_article_content_safe(url)
-                    
-                    if content:
-                        articles.append({
-                            'source': url,
-                            'title': title,
-                            'content': content[:1500],
-                            'published': created_at
-                        })
-                        print(f"   ✅ Found: {title[:50]}...")
+                    # Content comes from the article page itself
+                    candidates.append({
+                        'source': url,
+                        'title': title,
+                        'content': None,
+                        'published': created_at,
+                        'points': points
+                    })
                         
+    except requests.RequestException:
+        raise
     except Exception as e:
         print(f"   ⚠️ API scraping error: {e}")
     
-    return articles
+    return candidates
 
-def scrape_reddit_source(source, headers):
-    """Scrape from Reddit source"""
-    articles = []
+def list_reddit_source(source, headers, served=None):
+    """List candidate articles from a Reddit source"""
+    candidates = []
     
     try:
-        response = requests.get(source['url'], headers=headers, timeout=10)
+        response = cached_get(source['url'], headers=headers, timeout=10, ttl=source.get('ttl', 0))
+        _note_served(served, response)
         response.raise_for_status()
         
         data = response.json()
@@ -141,34 +537,30 @@ def scrape_reddit_source(source, headers):
                 selftext = post_data.get('selftext', '')
                 
                 if title and url and score > 10:  # Only posts with some engagement
-                    # Try to get real content from the external URL
-                    if selftext and len(selftext) > 100:
-                        content = selftext
-                    else:
-                        # Fetch content from the external article URL
-                        content = get_article_content_safe(url)
-                        if not content or len(content) < 100:
-                            content = f"Recent news: {title}. This article discusses important developments in the field."
-                    
-                    articles.append({
+                    # Self posts carry their own text; otherwise the external URL is fetched
+                    candidates.append({
                         'source': url,
                         'title': title,
-                        'content': content[:1500],
-                        'published': None
+                        'content': selftext if selftext and len(selftext) > 100 else None,
+                        'fallback': f"Recent news: {title}. This article discusses important developments in the field.",
+                        'published': None,
+                        'score': score
                     })
-                    print(f"   ✅ Found: {title[:50]}...")
                     
+    except requests.RequestException:
+        raise
     except Exception as e:
         print(f"   ⚠️ Reddit scraping error: {e}")
     
-    return articles
+    return candidates
 
-def scrape_arxiv_source(source, headers):
-    """Scrape from ArXiv source"""
-    articles = []
+def list_arxiv_source(source, headers, served=None):
+    """List articles from an ArXiv source (the abstract is the content)"""
+    candidates = []
     
     try:
-        response = requests.get(source['url'], headers=headers, timeout=10)
+        response = cached_get(source['url'], headers=headers, timeout=10, ttl=source.get('ttl', 0))
+        _note_served(served, response)
         response.raise_for_status()
         
         # Parse XML response
@@ -188,77 +580,116 @@ def scrape_arxiv_source(source, headers):
                 summary = summary_elem.text.strip()
                 url = link_elem.get('href') if link_elem is not None else ''
                 
-                articles.append({
+                candidates.append({
                     'source': url,
                     'title': title,
-                    'content': summary[:1500],
+                    'content': summary,
                     'published': None
                 })
-                print(f"   ✅ Found: {title[:50]}...")
                 
+    except requests.RequestException:
+        raise
     except Exception as e:
         print(f"   ⚠️ ArXiv scraping error: {e}")
     
-    return articles
+    return candidates
+
+def list_rss_source(source, headers, served=None):
+    """List candidate articles from an RSS / Atom feed.
 
-def get_article_content_safe(url):
-    """Safely get article content with error handling"""
+    The feed is streamed into an incremental parser and the download stops
+    once enough entries are read. Entries whose feed text is long enough are
+    used as-is; only short ones get their article page fetched.
+    """
+    candidates = []
+    
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, verify=False, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Try to extract main content with comprehensive selectors
-        content_selectors = [
-            # News site specific selectors
-            '.article-body p',
-            '.story-body p', 
-            '.article-content p',
-            '.post-content p',
-            '.entry-content p',
-            '.content p',
-            '.story p',
-            '.article p',
-            'article p',
-            'main p',
-            '.main p',
-            # Generic selectors
-            'p'
-        ]
-        
-        for selector in content_selectors:
-            paragraphs = soup.select(selector)
-            if paragraphs:
-                content_parts = []
-                for p in paragraphs[:5]:  # First 5 paragraphs for better context
-                    text = p.get_text(strip=True)
-                    if len(text) > 50:  # Longer minimum for better content
-                        content_parts.append(text)
+        # The listing stops after a few entries, so a prefix cached by an earlier run is enough
+        with open_stream(source['url'], headers=headers, timeout=10, ttl=source.get('ttl', 0),
+                         partial_ok=True) as stream:
+            _note_served(served, stream)
+            stream.raise_for_status()
+            
+            for item in iter_feed_items(stream.iter_content(), max_items=5):
+                text = item['content'] if len(item['content']) > len(item['summary']) else item['summary']
                 
-                if content_parts and len(' '.join(content_parts)) > 200:
-                    return ' '.join(content_parts)
-        
-        # Try to get content from meta description as fallback
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            desc = meta_desc.get('content').strip()
-            if len(desc) > 100:
-                return desc
+                candidates.append({
+                    'source': item['link'],
+                    'title': item['title'],
+                    'content': text if len(text) >= RSS_MIN_CONTENT else None,
+                    'fallback': text or None,
+                    'published': item['published']
+                })
+                
+    except requests.RequestException:
+        raise
+    except Exception as e:
+        print(f"   ⚠️ RSS scraping error: {e}")
+    
+    return candidates
+
+def get_article_content_safe(url, defer_parse=False):
+    """Safely get article content with error handling.
+
+    With defer_parse (and the parse pool running) a downloaded page comes
+    back as the Future of its text instead, so the caller can collect it.
+    """
+    host = get_host(url)
+    # Pages are tracked apart from the host's listings: a site whose articles
+    # keep failing is skipped until its cool-down ends, and callers fall back to the listing text
+    health_key = f"page:{host}"
+    if not source_health.allow(health_key):
+        count('fetches_skipped', host=host)
+        return ""
+    
+    served = {}
+    started = time.perf_counter()
+    with span('fetch', host) as outcome:
+        try:
+            content = _fetch_article_content(url, defer_parse, served)
+        except HostBackoff:
+            count('fetches_skipped', host=host)
+            return ""
+        except requests.RequestException as e:
+            # Only transport / HTTP errors count against the host; a PDF or a short page does not
+            print(f"     ⚠️ Error getting content from {url}: {e}")
+            outcome['ok'] = False
+            source_health.record(health_key, False, time.perf_counter() - started)
+            return ""
+    if served.get('sent_request'):
+        source_health.record(health_key, True, time.perf_counter() - started)
+    return content
+
+def _fetch_article_content(url, defer_parse=False, served=None):
+    """Download and extract a page; transport and HTTP errors are raised"""
+    try:
+        # The streaming extractor stops where an earlier run did, so a cached prefix serves it
+        with open_stream(url, headers=DEFAULT_HEADERS, verify=False, timeout=10, ttl=CACHE_TTLS['article'],
+                         partial_ok=not parse_pool_enabled()) as stream:
+            _note_served(served, stream)
+            stream.raise_for_status()
+            
+            # PDFs, images and the like are not worth downloading
+            content_type = stream.headers.get('Content-Type', '')
+            if not is_html_content_type(content_type):
+                print(f"     ⏭️ Skipping non-HTML content ({content_type}) at {url}")
+                return ""
+            
+            encoding = charset_from_content_type(content_type)
+            if not parse_pool_enabled():
+                # Stops downloading at the byte budget or once enough paragraphs are in
+                return extract_from_chunks(
+                    stream.iter_content(),
+                    max_bytes=MAX_HTML_BYTES,
+                    encoding=encoding
+                )
+            data = read_limited(stream.iter_content(), MAX_HTML_BYTES)
         
-        # Final fallback: get all text and clean it
-        text = soup.get_text()
-        if len(text) > 100:
-            # Clean up the text
-            lines = text.split('\n')
-            clean_lines = [line.strip() for line in lines if len(line.strip()) > 50]
-            if clean_lines:
-                return ' '.join(clean_lines[:3])  # First 3 substantial lines
+        # Ingestion: the host slot and connection are free again; a worker process does the parsing
+        return submit_parse(data, encoding) if defer_parse else parse_html(data, encoding)
         
+    except requests.RequestException:
+        raise
     except Exception as e:
         print(f"     ⚠️ Error getting content from {url}: {e}")
     
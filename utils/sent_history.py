@@ -0,0 +1,194 @@
+"""
+Per-user send history: hashes of the article URLs each reader was sent,
+kept in Supabase next to user_preference, with a Bloom filter per user for
+cheap "already sent?" checks before any article body is fetched
+"""
+
+import base64
+import hashlib
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+from utils.dedup import canonicalize_url
+from utils.supabase_client import get_supabase_client
+
+# Articles a filter is sized for, and its false-positive rate at that size
+SENT_FILTER_CAPACITY = int(os.getenv("SENT_FILTER_CAPACITY", "1000"))
+SENT_FILTER_ERROR = float(os.getenv("SENT_FILTER_ERROR", "0.01"))
+
+# A full filter is rebuilt from the sends of this many days, so old articles can return
+SENT_HISTORY_DAYS = int(os.getenv("SENT_HISTORY_DAYS", "30"))
+
+SENT_BATCH_SIZE = 500
+
+
+def url_hash(url: str):
+    """Hex digest of a URL's canonical form (what the history stores)"""
+    canonical_url = canonicalize_url(url, resolve_redirects=False) or url
+    return hashlib.sha256(canonical_url.encode('utf-8')).hexdigest()[:32]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over url_hash values.
+
+    `url in filter` may say yes for an article never sent (about
+    SENT_FILTER_ERROR of the time at capacity) but never says no for one
+    that was. Serialises to a short text column.
+    """
+
+    def __init__(self, capacity=SENT_FILTER_CAPACITY, error_rate=SENT_FILTER_ERROR, bits=None, hashes=None):
+        self.size = bits or max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: str):
+        # Double hashing: k positions from the two 64-bit halves of the digest
+        h1, h2 = int(digest[:16], 16), int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add_hash(self, digest: str):
+        new = False
+        for position in self._positions(digest):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        self.count += new
+
+    def add(self, url: str):
+        self.add_hash(url_hash(url))
+
+    def contains_hash(self, digest: str):
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(digest))
+
+    def __contains__(self, url):
+        return bool(self.count) and self.contains_hash(url_hash(url))
+
+    def __len__(self):
+        return self.count
+
+    def copy(self):
+        clone = BloomFilter(bits=self.size, hashes=self.hashes)
+        clone.bits[:] = self.bits
+        clone.count = self.count
+        return clone
+
+    def is_full(self):
+        return self.count >= self.size / self.hashes * math.log(2)
+
+    def to_text(self):
+        return f"{self.size}:{self.hashes}:{self.count}:{base64.b64encode(bytes(self.bits)).decode('ascii')}"
+
+    def digest(self):
+        """Short fingerprint: readers with equal filters were sent the same articles"""
+        return hashlib.sha1(self.to_text().encode('ascii')).hexdigest()[:12] if self.count else ''
+
+    @classmethod
+    def from_text(cls, text):
+        if not text:
+            return cls()
+        try:
+            size, hashes, count, data = text.split(':', 3)
+            bloom = cls(bits=int(size), hashes=int(hashes))
+            bits = base64.b64decode(data)
+            if len(bits) != len(bloom.bits):
+                raise ValueError("filter size mismatch")
+            bloom.bits[:] = bits
+            bloom.count = int(count)
+            return bloom
+        except ValueError as e:
+            print(f"⚠️ Ignoring unreadable sent filter: {e}")
+            return cls()
+
+
+def get_sent_filter(email: str):
+    """A reader's Bloom filter (empty if they have none yet)"""
+    return get_sent_filters([email]).get(email) or BloomFilter()
+
+
+def get_sent_filters(emails: list, chunk_size=200):
+    """{email: BloomFilter} for many readers in a few requests; readers without history are left out"""
+    found = {}
+    emails = list(dict.fromkeys(emails))
+    try:
+        for start in range(0, len(emails), chunk_size):
+            response = get_supabase_client().table('user_preference')\
+                .select("email, sent_filter")\
+                .in_('email', emails[start:start + chunk_size])\
+                .execute()
+            for row in response.data or []:
+                if row.get('sent_filter'):
+                    found[row['email']] = BloomFilter.from_text(row['sent_filter'])
+    except Exception as e:
+        print(f"Error: {e}")
+    return found
+
+
+def _rebuild_filter(email: str):
+    """Fresh filter from the last SENT_HISTORY_DAYS of a reader's sends"""
+    bloom = BloomFilter()
+    since = (datetime.now(timezone.utc) - timedelta(days=SENT_HISTORY_DAYS)).isoformat()
+    response = get_supabase_client().table('sent_article')\
+        .select("url_hash")\
+        .eq('email', email)\
+        .gte('sent_at', since)\
+        .execute()
+    for row in response.data or []:
+        bloom.add_hash(row['url_hash'])
+    return bloom
+
+
+def record_sent(email: str, topics: list, urls: list, sent_filter=None):
+    """Remember that a reader was sent these articles"""
+    return record_sent_many([email], topics, urls, sent_filter)
+
+
+def record_sent_many(emails: list, topics: list, urls: list, sent_filter=None):
+    """Remember that readers sharing one filter were sent these articles"""
+    return record_sent_each({email: sent_filter for email in emails}, topics, urls)
+
+
+def record_sent_each(filters: dict, topics: list, urls: list):
+    """Remember that readers ({email: their current filter or None}) were sent these articles.
+
+    Appends the URL hashes to sent_article and stores each reader's updated
+    filter on their user_preference row, SENT_BATCH_SIZE rows per request.
+    Safe to repeat: URLs already recorded for a reader change nothing.
+    """
+    hashes = list(dict.fromkeys(url_hash(url) for url in urls if url))
+    if not filters or not hashes:
+        return True
+    try:
+        # Readers with the same filter get the same update, so each distinct one is built once
+        updated = {}
+        preference_rows = []
+        for email, sent_filter in filters.items():
+            sent_filter = sent_filter or BloomFilter()
+            filter_text = updated.get(sent_filter.to_text())
+            if filter_text is None:
+                bloom = sent_filter.copy()
+                if bloom.is_full():
+                    bloom = _rebuild_filter(email)
+                for digest in hashes:
+                    bloom.add_hash(digest)
+                filter_text = updated[sent_filter.to_text()] = bloom.to_text()
+            preference_rows.append({'email': email, 'topics': topics, 'sent_filter': filter_text})
+
+        client = get_supabase_client()
+        # user_preference first: sent_article rows reference it
+        for start in range(0, len(preference_rows), SENT_BATCH_SIZE):
+            client.table('user_preference')\
+                .upsert(preference_rows[start:start + SENT_BATCH_SIZE], on_conflict='email')\
+                .execute()
+
+        sent_rows = [{'email': email, 'url_hash': digest} for email in filters for digest in hashes]
+        for start in range(0, len(sent_rows), SENT_BATCH_SIZE):
+            client.table('sent_article')\
+                .upsert(sent_rows[start:start + SENT_BATCH_SIZE], on_conflict='email,url_hash')\
+                .execute()
+        return True
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
@@ -0,0 +1,298 @@
+"""
+Per-source health for the scraper: rolling success rate, latency and yield
+EWMAs, 429 / Retry-After backoff and circuit breakers, persisted across runs
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from utils.http_cache import CACHE_DIR
+
+HEALTH_ENABLED = os.getenv("SOURCE_HEALTH_ENABLED", "1") != "0"
+
+# Weight of the newest observation in the rolling averages
+HEALTH_ALPHA = float(os.getenv("SOURCE_HEALTH_ALPHA", "0.3"))
+
+# Consecutive failures that open a source's circuit
+HEALTH_FAILURE_THRESHOLD = int(os.getenv("SOURCE_HEALTH_FAILURES", "3"))
+
+# First cool-down after the circuit opens (seconds); doubles on each re-trip up to the max
+HEALTH_COOLDOWN = float(os.getenv("SOURCE_HEALTH_COOLDOWN", "300"))
+HEALTH_MAX_COOLDOWN = float(os.getenv("SOURCE_HEALTH_MAX_COOLDOWN", "3600"))
+
+# Assumed latency / yield of a source with no history, so new sources get tried early
+DEFAULT_LATENCY = 1.0
+DEFAULT_YIELD = 5.0
+
+# How long a half-open circuit lets its single trial request run before others may try
+PROBE_WINDOW = 30.0
+
+# Changed states are written to disk at most this often (seconds); trips and 429s go out at once
+HEALTH_FLUSH_INTERVAL = float(os.getenv("SOURCE_HEALTH_FLUSH_INTERVAL", "5"))
+
+
+class SourceState:
+    """Rolling health of one source URL or host"""
+
+    __slots__ = ('success', 'latency', 'yield_', 'failures', 'trips', 'open_until', 'probe_until')
+
+    def __init__(self, success=1.0, latency=None, yield_=None, failures=0, trips=0, open_until=0.0):
+        self.success = success
+        self.latency = latency
+        self.yield_ = yield_
+        self.failures = failures
+        self.trips = trips
+        self.open_until = open_until
+        self.probe_until = 0.0
+
+    def expected_rate(self):
+        """Expected articles per second of one request"""
+        latency = self.latency if self.latency is not None else DEFAULT_LATENCY
+        yield_ = self.yield_ if self.yield_ is not None else DEFAULT_YIELD
+        return self.success * yield_ / max(latency, 0.05)
+
+
+def _ewma(previous, value, alpha=HEALTH_ALPHA):
+    return value if previous is None else alpha * value + (1 - alpha) * previous
+
+
+def parse_retry_after(value, default=HEALTH_COOLDOWN):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class SourceHealth:
+    """Thread-safe health registry.
+
+    Keys are a source URL (its listing), 'page:<host>' (article pages on a
+    host) or a bare host, which only ever carries 429 backoff (see
+    rate_limited) and is what utils.http_client checks before any request.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "source_health.sqlite3")
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._dirty = set()
+        self._flushed_at = time.monotonic()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS source_health (
+                key TEXT PRIMARY KEY,
+                success REAL,
+                latency REAL,
+                yield REAL,
+                failures INTEGER,
+                trips INTEGER,
+                open_until REAL
+            )
+        """)
+        self._db.commit()
+        self._states = {
+            row[0]: SourceState(*row[1:])
+            for row in self._db.execute(
+                "SELECT key, success, latency, yield, failures, trips, open_until FROM source_health"
+            )
+        }
+
+    def _state(self, key: str):
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = SourceState()
+        return state
+
+    def _changed(self, key: str, urgent=False):
+        """Mark a key for the next flush; caller holds the lock. Returns whether to flush now."""
+        self._dirty.add(key)
+        return urgent or time.monotonic() - self._flushed_at >= HEALTH_FLUSH_INTERVAL
+
+    def flush(self):
+        """Write changed states to disk in one transaction.
+
+        Best-effort: a write that fails (e.g. the database is locked by
+        another process) is logged and retried on the next flush, never
+        raised to the fetch that triggered it.
+        """
+        # Snapshot and write under one lock, so an older snapshot never lands after a newer one
+        with self._db_lock:
+            with self._lock:
+                rows = [
+                    (key, s.success, s.latency, s.yield_, s.failures, s.trips, s.open_until)
+                    for key, s in ((key, self._states.get(key)) for key in self._dirty) if s
+                ]
+                self._dirty.clear()
+                self._flushed_at = time.monotonic()
+            if not rows:
+                return
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO source_health VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Source health write skipped: {e}")
+                self._db.rollback()
+                with self._lock:
+                    self._dirty.update(row[0] for row in rows)
+
+    def record(self, key: str, ok: bool, seconds: float, yield_count=None):
+        """Fold one request's outcome into the key's averages; opens the circuit after repeated failures"""
+        with self._lock:
+            state = self._state(key)
+            state.success = _ewma(state.success, 1.0 if ok else 0.0)
+            state.latency = _ewma(state.latency, seconds)
+            if yield_count is not None:
+                state.yield_ = _ewma(state.yield_, float(yield_count))
+            state.probe_until = 0.0
+            tripped = False
+            if ok:
+                state.failures = 0
+                state.trips = 0
+                state.open_until = 0.0
+            else:
+                state.failures += 1
+                if state.failures >= HEALTH_FAILURE_THRESHOLD:
+                    cooldown = min(HEALTH_COOLDOWN * 2 ** state.trips, HEALTH_MAX_COOLDOWN)
+                    state.trips += 1
+                    state.open_until = time.time() + cooldown
+                    tripped = True
+                    print(f"   🔌 Circuit open for {key} ({state.failures} failures in a row), "
+                          f"retrying in {cooldown:.0f}s")
+            flush = self._changed(key, urgent=tripped)
+        if flush:
+            self.flush()
+
+    def rate_limited(self, key: str, retry_after=None):
+        """Back off from a key that answered 429 for as long as it asked (Retry-After)"""
+        wait_seconds = min(parse_retry_after(retry_after), HEALTH_MAX_COOLDOWN)
+        with self._lock:
+            state = self._state(key)
+            state.open_until = max(state.open_until, time.time() + wait_seconds)
+            self._changed(key, urgent=True)
+        self.flush()
+        print(f"   🐢 {key} is rate limiting us, backing off for {wait_seconds:.0f}s")
+
+    def allow(self, key: str):
+        """Whether a request to the key may go out now.
+
+        Once a cool-down ends the circuit is half-open: one trial request
+        is let through and its outcome (see record) closes or re-opens it.
+        """
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return True
+            now = time.time()
+            if now < state.open_until:
+                return False
+            if state.failures >= HEALTH_FAILURE_THRESHOLD:
+                if now < state.probe_until:
+                    return False
+                state.probe_until = now + PROBE_WINDOW
+            return True
+
+    def retry_in(self, key: str):
+        """Seconds until the key's circuit closes (0 if it is closed)"""
+        with self._lock:
+            state = self._states.get(key)
+            return max(0.0, state.open_until - time.time()) if state else 0.0
+
+    def expected_rate(self, key: str):
+        with self._lock:
+            state = self._states.get(key)
+            return (state or SourceState()).expected_rate()
+
+    def snapshot(self):
+        """One row per tracked key, best expected yield per second first"""
+        now = time.time()
+        with self._lock:
+            rows = [{
+                'key': key,
+                'success_rate': round(s.success, 3),
+                'latency_ms': round(s.latency * 1000, 1) if s.latency is not None else None,
+                'yield': round(s.yield_, 2) if s.yield_ is not None else None,
+                'articles_per_s': round(s.expected_rate(), 3),
+                'failures_in_row': s.failures,
+                'open_for_s': round(max(0.0, s.open_until - now)),
+            } for key, s in self._states.items()]
+        rows.sort(key=lambda row: -row['articles_per_s'])
+        return rows
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+        with self._db_lock:
+            if key is None:
+                self._db.execute("DELETE FROM source_health")
+            else:
+                self._db.execute("DELETE FROM source_health WHERE key = ?", (key,))
+            self._db.commit()
+
+
+_health = None
+_health_lock = threading.Lock()
+
+
+def get_source_health():
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = SourceHealth()
+            # Whatever changed since the last flush
+            atexit.register(_health.flush)
+        return _health
+
+
+def record(key: str, ok: bool, seconds: float, yield_count=None):
+    if HEALTH_ENABLED:
+        get_source_health().record(key, ok, seconds, yield_count)
+
+
+def allow(key: str):
+    return not HEALTH_ENABLED or get_source_health().allow(key)
+
+
+def rate_limited(key: str, retry_after=None):
+    if HEALTH_ENABLED:
+        get_source_health().rate_limited(key, retry_after)
+
+
+def rank_sources(sources: list):
+    """Drop sources whose circuit is open or whose host is rate limiting us, ordering the rest by expected yield per second"""
+    if not HEALTH_ENABLED or not sources:
+        return sources
+    from utils.http_client import get_host
+
+    health = get_source_health()
+    ranked = []
+    for source in sources:
+        host = get_host(source['url'])
+        if not health.retry_in(host) and health.allow(source['url']):
+            ranked.append(source)
+        else:
+            wait_seconds = max(health.retry_in(source['url']), health.retry_in(host))
+            reason = f"retry in {wait_seconds:.0f}s" if wait_seconds >= 1 else "trial request in flight"
+            print(f"   ⏭️ Skipping {source['name']} (circuit open, {reason})")
+    ranked.sort(key=lambda source: health.expected_rate(source['url']), reverse=True)
+    return ranked
@@ -0,0 +1,88 @@
+"""
+Shared, lazily created Supabase client for the whole process
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+
+_client = None
+_http_client = None
+_lock = threading.Lock()
+
+
+def _get_http_client():
+    """One keep-alive connection pool shared by every Supabase client"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=SUPABASE_POOL_SIZE,
+                                max_keepalive_connections=SUPABASE_POOL_SIZE)
+        )
+    return _http_client
+
+
+def _create_client():
+    from supabase import create_client
+
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    try:
+        from supabase import SyncClientOptions
+        options = SyncClientOptions(httpx_client=_get_http_client())
+    except (ImportError, TypeError):
+        # Older supabase releases cannot share an HTTP client
+        return create_client(url, key)
+    return create_client(url, key, options)
+
+
+def create_auth_client():
+    """A new GoTrue (Supabase auth) client for one user's sign-in, refresh or sign-out.
+
+    A client keeps the session of whoever last signed in or refreshed through
+    it, so per-user calls must not go through a process-wide client, where the
+    next visitor would pick that session up. This one keeps it in memory only
+    and is dropped after the call; it shares the HTTP connection pool.
+    """
+    try:
+        from supabase_auth import SyncGoTrueClient
+    except ImportError:
+        # Older supabase releases ship the auth client as gotrue
+        from gotrue import SyncGoTrueClient
+
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    options = dict(
+        url=f"{url.rstrip('/')}/auth/v1",
+        headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+        auto_refresh_token=False,
+        persist_session=False
+    )
+    try:
+        return SyncGoTrueClient(http_client=_get_http_client(), **options)
+    except TypeError:
+        return SyncGoTrueClient(**options)
+
+
+def get_supabase_client():
+    """Process-wide Supabase client, created on first use.
+
+    Never sign users in through it: see create_auth_client.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _create_client()
+        return _client
+
+
+def set_supabase_client(client):
+    """Use a stand-in client (e.g. a local backend in tests); None resets to the real one"""
+    global _client
+    with _lock:
+        _client = client